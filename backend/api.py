@@ -1,18 +1,27 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import BaseModel, field_validator
+from typing import Dict, Literal, Optional
 from pipeline.story_maker import StoryMaker
+from pipeline.context import GenerationContext, LLMStage, parse_stage_models
+from pipeline.tts import parse_voice
+from pipeline.jobs import JobQueue
+from pipeline.image_batcher import ImageBatcher
+from pipeline.model_loader import ModelLoader
+from pipeline.cache import AudioCache, ImageCache, LLMResponseCache
 from models.models import Story
-from diffusers import StableDiffusionXLPipeline
-import torch
 import asyncio
+import json
 import os
 
 app = FastAPI(title="GenAI Story API")
 
 storymaker = None
 storymaker_lock = asyncio.Lock()
+job_queue = None
+keep_warm_task = None
+health_check_task = None
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,13 +31,79 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-print("Loading Stable Diffusion pipeline...")
-pipe = StableDiffusionXLPipeline.from_pretrained(
-    "stabilityai/sdxl-turbo",
-    torch_dtype=torch.float32,
+
+def load_pipeline(loader):
+    """
+    Loads the Stable Diffusion pipeline. Runs on a background thread
+    started at app startup, so the server can bind immediately.
+    """
+    loader.set_stage("Importing diffusers")
+    from diffusers import StableDiffusionXLPipeline
+    import torch
+
+    loader.set_stage("Loading stabilityai/sdxl-turbo weights")
+    pipe = StableDiffusionXLPipeline.from_pretrained(
+        "stabilityai/sdxl-turbo",
+        torch_dtype=torch.float32,
+    )
+    loader.set_stage("Moving pipeline to cpu")
+    return pipe.to("cpu")
+
+
+pipe_loader = ModelLoader(load_pipeline, name="sdxl-turbo")
+
+# Shared by every request so concurrent stories are rendered in the same batches.
+# IMAGE_BATCH_SIZE caps prompts per diffusion call, IMAGE_BATCH_WAIT_MS is how long
+# a batch waits for prompts from other stories before it runs. Prompts submitted
+# before the pipeline has loaded wait in the batcher's queue.
+# Rendered images are cached on disk under IMAGE_CACHE_DIR, capped at
+# IMAGE_CACHE_MAX_MB, so repeated prompts skip diffusion entirely.
+image_cache = ImageCache(
+    os.getenv("IMAGE_CACHE_DIR", "cache/images"),
+    max_bytes=int(os.getenv("IMAGE_CACHE_MAX_MB", "2048")) * 1024 ** 2,
+)
+# Narration audio is cached the same way under AUDIO_CACHE_DIR (AUDIO_CACHE_MAX_MB).
+audio_cache = AudioCache(
+    os.getenv("AUDIO_CACHE_DIR", "cache/audio"),
+    max_bytes=int(os.getenv("AUDIO_CACHE_MAX_MB", "512")) * 1024 ** 2,
+)
+# Opt-in LLM response cache for reproducible (fixed seed/temperature) runs:
+# LLM_CACHE is "off" (default), "memory", "disk" or "mongo"; entries expire after
+# LLM_CACHE_TTL seconds and at most LLM_CACHE_MAX_ENTRIES are kept in memory.
+llm_cache_backend = os.getenv("LLM_CACHE", "off")
+llm_cache = None if llm_cache_backend == "off" else LLMResponseCache(
+    backend=llm_cache_backend,
+    ttl=float(os.getenv("LLM_CACHE_TTL", "86400")),
+    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000")),
+    directory=os.getenv("LLM_CACHE_DIR", "cache/llm"),
 )
-pipe = pipe.to("cpu")
-print("Pipeline loaded!")
+image_batcher = ImageBatcher(
+    pipe_loader,
+    max_batch_size=int(os.getenv("IMAGE_BATCH_SIZE", "4")),
+    max_wait_ms=float(os.getenv("IMAGE_BATCH_WAIT_MS", "50")),
+    cache=image_cache,
+    model_id="stabilityai/sdxl-turbo",
+)
+
+# StoryMaker settings, read once when the singleton is created:
+# - OLLAMA_URLS: comma-separated Ollama servers to balance over (falls back to
+#   OLLAMA_URL, then http://ollama:11434). A server leaves the rotation for
+#   LLM_COOLDOWN seconds (default: 30) after LLM_FAILURE_THRESHOLD consecutive
+#   failures (default: 3).
+# - MODEL_NAME: the LLM to use (default: llama2). OLLAMA_STAGE_MODELS picks other
+#   models for individual stages, e.g. "title=llama3.2:1b,image_prompts=llama3.2:1b".
+#   Requests may choose these models, or those in the comma-separated
+#   OLLAMA_ALLOWED_MODELS, for their stages.
+# - OLLAMA_POOL_SIZE caps pooled connections per server (match Ollama's
+#   OLLAMA_NUM_PARALLEL); OLLAMA_CONNECT_TIMEOUT and OLLAMA_READ_TIMEOUT are in
+#   seconds; OLLAMA_KEEP_ALIVE is how long Ollama keeps a model loaded after a
+#   request (default: 30m).
+# - NARRATION_WORKERS bounds concurrent TTS requests across all stories,
+#   TTS_TIMEOUT is the per-attempt narration timeout in seconds, and TTS_ENGINE
+#   is used when a request's voice does not name an engine.
+# - VIDEO_STILL_FPS is the frame rate of the still-image scene clips and
+#   ENCODE_WORKERS caps concurrent ffmpeg encodes (default: one per CPU).
+
 
 async def get_storymaker():
     """
@@ -39,7 +114,29 @@ async def get_storymaker():
     global storymaker
     async with storymaker_lock:
         if storymaker is None:
-            storymaker = StoryMaker(pipe)
+            ollama_urls = os.getenv("OLLAMA_URLS") or os.getenv("OLLAMA_URL")
+            allowed_models = os.getenv("OLLAMA_ALLOWED_MODELS", "")
+            storymaker = StoryMaker(
+                None,
+                model_name=os.getenv("MODEL_NAME") or None,
+                stage_models=parse_stage_models(os.getenv("OLLAMA_STAGE_MODELS")),
+                allowed_models=[model.strip() for model in allowed_models.split(",") if model.strip()],
+                ollama_urls=ollama_urls.split(",") if ollama_urls else None,
+                llm_failure_threshold=int(os.getenv("LLM_FAILURE_THRESHOLD", "3")),
+                llm_cooldown=float(os.getenv("LLM_COOLDOWN", "30")),
+                image_batcher=image_batcher,
+                narration_workers=int(os.getenv("NARRATION_WORKERS", "8")),
+                tts_timeout=float(os.getenv("TTS_TIMEOUT", "30")),
+                default_tts_engine=os.getenv("TTS_ENGINE", "gtts"),
+                ollama_pool_size=int(os.getenv("OLLAMA_POOL_SIZE", "4")),
+                ollama_connect_timeout=float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5")),
+                ollama_read_timeout=float(os.getenv("OLLAMA_READ_TIMEOUT", "300")),
+                ollama_keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+                audio_cache=audio_cache,
+                llm_cache=llm_cache,
+                still_fps=float(os.getenv("VIDEO_STILL_FPS", "1")),
+                encode_workers=int(os.getenv("ENCODE_WORKERS", "0")) or None,
+            )
     return storymaker
 
 
@@ -48,9 +145,130 @@ class GenerateRequest(BaseModel):
     Request schema for generating a story.
     - genre: The genre of the story (default: fantasy).
     - num_scenes: Number of scenes to generate (default: 5).
+    - voice: Narration language, optionally prefixed by a TTS engine
+      ("gtts", "espeak" or "silent"), e.g. "espeak:en" (default: en).
+    - seed: Seed for reproducible images and LLM output (default: random).
+    - validation: "off", "background" (validate after responding and store
+      the scores on the story) or "gate" (regenerate ideas scoring below
+      min_validation_score) (default: background).
+    - min_validation_score: Lowest acceptable score in "gate" mode (default: 6).
+    - stream_scenes: Start rendering each scene while later scenes are still
+      being written by the LLM (default: False).
+    - planner: Plan the idea, title, scenes and image prompts in a single
+      LLM call returning JSON, falling back to one call per stage if the
+      plan is malformed (default: False).
+    - encoding_profile: "preview" (fast, low resolution), "standard" or
+      "final" (higher quality, slower) (default: standard).
+    - stage_models: Model per LLM stage for this story, e.g.
+      {"title": "llama3.2:1b"}; stages are idea, validation, title, scenes,
+      image_prompts and plan, and models must be allowed by the server
+      (default: server configuration).
+    - bypass_llm_cache: Skip the LLM response cache for this story, for more
+      creative variety (default: False).
     """
     genre: str = "fantasy"
     num_scenes: int = 5
+    voice: str = "en"
+    seed: Optional[int] = None
+    validation: Literal["off", "background", "gate"] = "background"
+    min_validation_score: int = 6
+    stream_scenes: bool = False
+    planner: bool = False
+    encoding_profile: Literal["preview", "standard", "final"] = "standard"
+    stage_models: Optional[Dict[LLMStage, str]] = None
+    bypass_llm_cache: bool = False
+
+    @field_validator("voice")
+    @classmethod
+    def check_voice(cls, voice):
+        # Reject an unknown TTS engine with a 422 up front, not after the LLM stages
+        parse_voice(voice)
+        return voice
+
+    def to_context(self, progress=None):
+        return GenerationContext(
+            genre=self.genre,
+            num_scenes=self.num_scenes,
+            voice=self.voice,
+            seed=self.seed,
+            validation=self.validation,
+            min_validation_score=self.min_validation_score,
+            stream_scenes=self.stream_scenes,
+            planner=self.planner,
+            encoding_profile=self.encoding_profile,
+            stage_models=self.stage_models or {},
+            bypass_llm_cache=self.bypass_llm_cache,
+            progress=progress,
+        )
+
+
+async def check_stage_models(params):
+    """
+    Rejects a request whose per-stage models the server does not allow.
+
+    Raises:
+        HTTPException 400: If a stage model is not allowed.
+    """
+    sm = await get_storymaker()
+    try:
+        sm.check_stage_models(params.stage_models or {})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.on_event("startup")
+async def start_model_loading():
+    """
+    Starts loading the diffusion pipeline in the background.
+    """
+    pipe_loader.start()
+
+
+@app.get("/healthz")
+async def healthz():
+    """
+    Liveness endpoint. Answers as soon as the server is up, even while
+    models are still loading.
+    """
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """
+    Readiness endpoint.
+
+    Returns:
+        JSONResponse: 200 once the diffusion pipeline is loaded, otherwise
+                      503. The body reports the loading state, current stage
+                      and elapsed time either way, and the circuit state of
+                      each LLM server.
+    """
+    status = pipe_loader.status()
+    return JSONResponse(
+        status_code=200 if pipe_loader.ready else 503,
+        content={
+            "ready": pipe_loader.ready,
+            "models": [status],
+            "llm_backends": storymaker.llm_router.stats() if storymaker else [],
+        },
+    )
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """
+    Endpoint reporting cache and batching statistics.
+
+    Returns:
+        dict: Hit/miss counters and sizes per cache, and image batch stats.
+    """
+    return {
+        "image_cache": image_cache.stats(),
+        "audio_cache": audio_cache.stats(),
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+        "image_batcher": dict(image_batcher.stats),
+    }
 
 
 @app.get("/download_file/")
@@ -69,7 +287,8 @@ async def download_file(path: str = Query(..., description="Path to the file to
     """
     if os.path.exists(path):
         filename = os.path.basename(path)
-        media_type = "video/mp4" if filename.endswith(".mp4") else "text/plain"
+        media_types = {".mp4": "video/mp4", ".mp3": "audio/mpeg", ".wav": "audio/wav", ".png": "image/png"}
+        media_type = media_types.get(os.path.splitext(filename)[1], "text/plain")
 
         return FileResponse(
             path=path,
@@ -80,6 +299,134 @@ async def download_file(path: str = Query(..., description="Path to the file to
         raise HTTPException(status_code=404, detail=f"File not found: {path}")
 
 
+def build_story_metadata(story_data):
+    """
+    Builds the response metadata for a generated story. Queries Mongo, so
+    call it off the event loop.
+
+    Args:
+        story_data (dict): Result returned by `StoryMaker.create_story`.
+
+    Returns:
+        dict: Metadata of the generated story including title, genre, scenes,
+              image prompts, validation (when already available), folder
+              path, and video file.
+
+    Raises:
+        HTTPException 500: If the story cannot be retrieved from the database.
+    """
+    story_doc = Story.objects(story_id=story_data["story_id"]).first()
+    if not story_doc:
+        raise HTTPException(status_code=500, detail="Failed to retrieve story from database")
+
+    return {
+        "story_id": story_doc.story_id,
+        "title": story_doc.title,
+        "genre": story_doc.genre,
+        "story_idea": story_doc.story_idea,
+        "scenes": [
+            {"scene": s.scene, "summary": s.summary, "description": s.description}
+            for s in story_doc.scenes
+        ],
+        "image_prompts": story_doc.image_prompts,
+        "validation": story_doc.validation,
+        "creativity_score": story_doc.creativity_score,
+        "relevance_score": story_doc.relevance_score,
+        "folder": story_doc.folder,
+        "video_file": story_data["video_file"],
+    }
+
+
+async def run_story_job(params, progress):
+    """
+    Runs a queued story generation job.
+
+    Args:
+        params (dict): Serialized `GenerateRequest` the job was submitted with.
+        progress (ProgressStream): Receives the job's progress events.
+
+    Returns:
+        dict: Metadata of the generated story (see `build_story_metadata`).
+    """
+    params = GenerateRequest(**params)
+    sm = await get_storymaker()
+    story_data = await sm.acreate_story(params.to_context(progress))
+    return await asyncio.to_thread(build_story_metadata, story_data)
+
+
+@app.on_event("startup")
+async def start_job_queue():
+    """
+    Starts the background job workers and re-queues unfinished jobs.
+    The number of concurrent jobs is set by the STORY_JOB_WORKERS env var
+    (default: 4).
+    """
+    global job_queue
+    job_queue = JobQueue(run_story_job, num_workers=int(os.getenv("STORY_JOB_WORKERS", "4")))
+    await job_queue.start()
+
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    """
+    Stops the background job workers. Running jobs are put back in the
+    queue and resumed on the next startup.
+    """
+    if job_queue is not None:
+        await job_queue.stop()
+
+
+@app.on_event("startup")
+async def start_llm_warm_up():
+    """
+    Loads the LLM in the background and keeps it loaded through quiet
+    periods. OLLAMA_WARMUP=0 skips the startup load; OLLAMA_KEEP_WARM_INTERVAL
+    is how many idle seconds trigger a keep-warm ping (default: 80% of
+    OLLAMA_KEEP_ALIVE, i.e. 24 minutes for the default 30m; 0 disables pings).
+    """
+    global keep_warm_task
+    sm = await get_storymaker()
+    warm_up = os.getenv("OLLAMA_WARMUP", "1") == "1"
+    interval = os.getenv("OLLAMA_KEEP_WARM_INTERVAL")
+    interval = float(interval) if interval else sm.default_keep_warm_interval()
+
+    async def keep_warm():
+        if warm_up:
+            await sm.awarm_up()
+        if interval > 0:
+            await sm.akeep_warm(interval)
+
+    keep_warm_task = asyncio.create_task(keep_warm())
+
+
+@app.on_event("startup")
+async def start_llm_health_checks():
+    """
+    Probes every Ollama server every OLLAMA_HEALTH_INTERVAL seconds
+    (default: 15; 0 disables) so failed servers leave the rotation, and
+    recovered ones rejoin it, without waiting for a request to fail.
+    """
+    global health_check_task
+    interval = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "15"))
+    if interval > 0:
+        sm = await get_storymaker()
+        health_check_task = asyncio.create_task(sm.async_ollama.monitor_health(interval))
+
+
+@app.on_event("shutdown")
+async def close_llm_clients():
+    """
+    Stops keep-warm pings and health checks and closes the pooled Ollama
+    connections.
+    """
+    for task in (keep_warm_task, health_check_task):
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    if storymaker is not None:
+        await storymaker.async_ollama.aclose()
+
+
 @app.post("/generate_story/")
 async def generate_story_api(params: GenerateRequest):
     """
@@ -92,44 +439,159 @@ async def generate_story_api(params: GenerateRequest):
     4. Returns structured metadata and asset paths.
 
     Args:
-        params (GenerateRequest): Genre and number of scenes to generate.
+        params (GenerateRequest): Genre, number of scenes, voice and seed.
 
     Returns:
         dict: Metadata of the generated story including title, genre, scenes,
               image prompts, folder path, and video file.
 
     Raises:
+        HTTPException 400: If a stage model is not allowed.
         HTTPException 500: If story generation or database retrieval fails.
     """
+    await check_stage_models(params)
     try:
         sm = await get_storymaker()
-        sm.genre = params.genre
-        sm.num_scenes = params.num_scenes
-
-        story_data = await asyncio.to_thread(sm.create_story)
-
-        story_doc = Story.objects(story_id=story_data["story_id"]).first()
-        if not story_doc:
-            raise HTTPException(status_code=500, detail="Failed to retrieve story from database")
-
-        response_data = {
-            "story_id": story_doc.story_id,
-            "title": story_doc.title,
-            "genre": story_doc.genre,
-            "story_idea": story_doc.story_idea,
-            "scenes": [
-                {"scene": s.scene, "summary": s.summary, "description": s.description}
-                for s in story_doc.scenes
-            ],
-            "image_prompts": story_doc.image_prompts,
-            "folder": story_doc.folder,
-            "video_file": story_data["video_file"],
-        }
+        story_data = await sm.acreate_story(params.to_context())
 
         return {
-            "metadata": response_data,
+            "metadata": await asyncio.to_thread(build_story_metadata, story_data),
             "message": f"Story in '{params.genre}' generated successfully!"
         }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/jobs/", status_code=202)
+async def submit_story_job(params: GenerateRequest):
+    """
+    Endpoint to submit a story generation job without waiting for it.
+
+    Args:
+        params (GenerateRequest): Genre and number of scenes to generate.
+
+    Returns:
+        dict: The job ID and its initial status. Poll `/jobs/{job_id}` for
+              progress and `/jobs/{job_id}/result` for the story metadata.
+
+    Raises:
+        HTTPException 400: If a stage model is not allowed.
+    """
+    await check_stage_models(params)
+    job_id = await job_queue.submit(params.model_dump())
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """
+    Endpoint to check the status of a story generation job.
+
+    Args:
+        job_id (str): ID returned by `/jobs/`.
+
+    Returns:
+        dict: Job status, timestamps, queue position (while queued) and
+              error message (if the job failed).
+
+    Raises:
+        HTTPException 404: If the job does not exist.
+    """
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "params": job.params,
+        "queue_position": job_queue.position(job_id) if job.status == "queued" else None,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "error": job.error,
+    }
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """
+    Endpoint to fetch the result of a completed story generation job.
+
+    Args:
+        job_id (str): ID returned by `/jobs/`.
+
+    Returns:
+        dict: Same payload as `/generate_story/`.
+
+    Raises:
+        HTTPException 404: If the job does not exist.
+        HTTPException 409: If the job has not completed yet.
+        HTTPException 500: If the job failed.
+    """
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status}")
+
+    return {
+        "metadata": job.result,
+        "message": f"Story in '{job.params.get('genre')}' generated successfully!"
+    }
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, last_event_id: Optional[int] = Header(None)):
+    """
+    Server-Sent Events stream of a job's progress.
+
+    Emits every event so far and then live events as the story is built:
+    queued, running, idea, title, scene, image_prompt, story_saved, audio,
+    image, clip, video and finally completed (with the story metadata) or
+    failed. Each event's data is a JSON object with partial metadata.
+    When an EventSource reconnects, only events after its Last-Event-ID
+    are sent again.
+
+    Args:
+        job_id (str): ID returned by `/jobs/`.
+        last_event_id (int | None): ID of the last event the client received.
+
+    Returns:
+        StreamingResponse: A `text/event-stream` response.
+
+    Raises:
+        HTTPException 404: If the job does not exist.
+    """
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    progress = job_queue.progress.get(job_id)
+
+    async def event_stream():
+        if progress is None:
+            # Finished before this process started (or its events expired): report the outcome only
+            if job.status == "completed":
+                yield format_sse(0, "completed", {"job_id": job_id, "metadata": job.result})
+            elif job.status == "failed":
+                yield format_sse(0, "failed", {"job_id": job_id, "error": job.error})
+            return
+        async for message in progress.subscribe(after=last_event_id):
+            yield format_sse(message["id"], message["event"], message["data"])
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def format_sse(event_id, event, data):
+    """
+    Formats one Server-Sent Event.
+    """
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
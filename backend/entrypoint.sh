@@ -1,3 +1,7 @@
 #!/bin/bash
 set -e
-exec uvicorn api:app --host 0.0.0.0 --port 8000 --reload
+# Auto-reload reloads the diffusion pipeline on every code change; opt in with UVICORN_RELOAD=1
+if [ "${UVICORN_RELOAD:-0}" = "1" ]; then
+    exec uvicorn api:app --host 0.0.0.0 --port 8000 --reload
+fi
+exec uvicorn api:app --host 0.0.0.0 --port 8000
@@ -42,6 +42,10 @@ class Story(me.Document):
         image_prompts (dict): Key-value mapping for generated image prompts.
         raw_image_prompts (str): Raw string containing all image prompts.
 
+        validation (str): LLM critique of the story idea, if validation ran.
+        creativity_score (int): Creativity score (1-10) parsed from the critique.
+        relevance_score (int): Genre relevance score (1-10) parsed from the critique.
+
         folder (str): Optional folder reference for storing related assets.
         created_at (datetime): Timestamp of when the story was created.
     """
@@ -55,5 +59,58 @@ class Story(me.Document):
     image_prompts = me.MapField(field=me.StringField())
     raw_image_prompts = me.StringField()
 
+    validation = me.StringField()
+    creativity_score = me.IntField()
+    relevance_score = me.IntField()
+
     folder = me.StringField()
-    created_at = me.DateTimeField(default=datetime.utcnow)
\ No newline at end of file
+    created_at = me.DateTimeField(default=datetime.utcnow)
+
+class Job(me.Document):
+    """
+    Represents an asynchronous story generation job stored in MongoDB.
+
+    Attributes:
+        job_id (str): Unique identifier for the job.
+        status (str): One of "queued", "running", "completed" or "failed".
+        params (dict): Request parameters the job was submitted with.
+        result (dict): Story metadata once the job has completed.
+        error (str): Error message if the job failed.
+
+        created_at (datetime): Timestamp of when the job was submitted.
+        started_at (datetime): Timestamp of when a worker picked up the job.
+        finished_at (datetime): Timestamp of when the job completed or failed.
+    """
+    STATUSES = ("queued", "running", "completed", "failed")
+
+    job_id = me.StringField(required=True, unique=True)
+    status = me.StringField(required=True, choices=STATUSES, default="queued")
+    params = me.DictField()
+    result = me.DictField()
+    error = me.StringField()
+
+    created_at = me.DateTimeField(default=datetime.utcnow)
+    started_at = me.DateTimeField()
+    finished_at = me.DateTimeField()
+
+    meta = {"indexes": ["status", "created_at"]}
+
+
+class LLMCacheEntry(me.Document):
+    """
+    Cached LLM response, used when the LLM response cache is backed by MongoDB.
+
+    Attributes:
+        key (str): Hash of the model name, prompt and generation options.
+        model (str): Model that produced the response.
+        response (str): The cached completion.
+        created_at (datetime): Timestamp of when the response was cached.
+        expires_at (datetime): MongoDB's TTL monitor deletes the entry after this.
+    """
+    key = me.StringField(required=True, unique=True)
+    model = me.StringField()
+    response = me.StringField(required=True)
+    created_at = me.DateTimeField(default=datetime.utcnow)
+    expires_at = me.DateTimeField(required=True)
+
+    meta = {"indexes": [{"fields": ["expires_at"], "expireAfterSeconds": 0}]}
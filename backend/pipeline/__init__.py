@@ -1,5 +1,46 @@
 from .story_maker import StoryMaker
+from .context import GenerationContext
+from .jobs import JobQueue
+from .progress import ProgressStream
+from .video import EncodingProfile, ENCODING_PROFILES, concat_clips, render_still_clip
+from .cache import DiskLRUCache, ImageCache, AudioCache, LLMResponseCache
+from .image_batcher import ImageBatcher
+from .model_loader import ModelLoader
+from .scene_pipeline import ScenePipeline
+from .stage_graph import StageGraph
+from .parsing import IncrementalSceneParser, missing_scenes, parse_scenes
+from .planner import PlanError, parse_plan
+from .ollama_client import AsyncOllamaClient, OllamaRequestError
+from .llm_router import LLMRouter
+from .tts import TTSBackend, GTTSBackend, EspeakBackend, SilentTTSBackend
 
 __all__ = [
-    "StoryMaker"
+    "StoryMaker",
+    "GenerationContext",
+    "JobQueue",
+    "ProgressStream",
+    "render_still_clip",
+    "concat_clips",
+    "EncodingProfile",
+    "ENCODING_PROFILES",
+    "DiskLRUCache",
+    "ImageCache",
+    "AudioCache",
+    "LLMResponseCache",
+    "ImageBatcher",
+    "ModelLoader",
+    "ScenePipeline",
+    "StageGraph",
+    "IncrementalSceneParser",
+    "parse_scenes",
+    "missing_scenes",
+    "PlanError",
+    "parse_plan",
+    "AsyncOllamaClient",
+    "OllamaRequestError",
+    "LLMRouter",
+    "TTSBackend",
+    "GTTSBackend",
+    "EspeakBackend",
+    "SilentTTSBackend",
 ]
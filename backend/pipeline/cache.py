@@ -0,0 +1,314 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from PIL import Image
+
+
+def cache_key(*parts):
+    """Stable content hash of the given JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskLRUCache:
+    """
+    Content-addressed file cache on local disk with an LRU size cap.
+
+    Entries are stored as `<directory>/<key[:2]>/<key><suffix>`. A hit bumps
+    the file's access time, and when the cache grows past `max_bytes` the
+    least recently used files are evicted. The modification time is never
+    touched, because entries hard-linked into story folders share it and
+    clip reuse checks depend on it. Safe to use from several
+    threads; writes are atomic renames, so concurrent processes sharing the
+    directory never see partial files.
+
+    Args:
+        directory (str | Path): Where entries are stored.
+        max_bytes (int): Size cap for all entries together.
+        suffix (str): File extension of the stored entries.
+    """
+
+    def __init__(self, directory, max_bytes=1024 ** 3, suffix=""):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size = sum(path.stat().st_size for path in self._entries())
+
+    def path_for(self, key):
+        return self.directory / key[:2] / f"{key}{self.suffix}"
+
+    def get(self, key):
+        """Returns the path of a cached entry (marking it recently used), or None."""
+        path = self.path_for(key)
+        try:
+            os.utime(path, (time.time(), path.stat().st_mtime))
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def put_file(self, key, source):
+        """Copies `source` into the cache and returns the cached path."""
+        return self._store(key, lambda tmp: shutil.copyfile(source, tmp))
+
+    def put_bytes(self, key, data):
+        return self._store(key, lambda tmp: tmp.write_bytes(data))
+
+    def link_to(self, key, destination):
+        """
+        Materializes a cached entry at `destination`, hard-linking when the
+        filesystem allows it and copying otherwise. Returns `destination`,
+        or None on a miss.
+        """
+        path = self.get(key)
+        if path is None:
+            return None
+        destination = Path(destination)
+        destination.unlink(missing_ok=True)
+        try:
+            os.link(path, destination)
+        except OSError:
+            shutil.copyfile(path, destination)
+        return destination
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _store(self, key, write):
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            write(tmp)
+            size = tmp.stat().st_size
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        with self._lock:
+            self._size += size - previous
+        self._evict()
+        return path
+
+    def _entries(self):
+        return (
+            path for path in self.directory.glob(f"*/*{self.suffix}")
+            if not path.name.startswith(".")
+        )
+
+    def _evict(self):
+        with self._lock:
+            if self._size <= self.max_bytes:
+                return
+            entries = []
+            for path in self._entries():
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+            self._size = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if self._size <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                self._size -= size
+                self.evictions += 1
+
+
+class ImageCache:
+    """
+    Cache of rendered diffusion images keyed by everything that determines
+    the output: model ID, prompt, step count, guidance scale and seed.
+
+    Args:
+        directory (str | Path): Where PNGs are stored.
+        max_bytes (int): Size cap before least recently used images are evicted.
+    """
+
+    def __init__(self, directory, max_bytes=2 * 1024 ** 3):
+        self.store = DiskLRUCache(directory, max_bytes=max_bytes, suffix=".png")
+
+    def key(self, model_id, prompt, num_inference_steps, guidance_scale, seed):
+        return cache_key("image", model_id, prompt, num_inference_steps, guidance_scale, seed)
+
+    def get(self, key):
+        path = self.store.get(key)
+        if path is None:
+            return None
+        try:
+            with Image.open(path) as image:
+                image.load()
+                return image.copy()
+        except (OSError, FileNotFoundError):
+            # Evicted or corrupted between the lookup and the read
+            return None
+
+    def put(self, key, image):
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        self.store.put_bytes(key, buffer.getvalue())
+
+    def stats(self):
+        return self.store.stats()
+
+
+class AudioCache:
+    """
+    Cache of narration audio keyed by TTS engine, language and normalized
+    text, shared by every story. Hits are hard-linked (or copied) into the
+    story folder instead of calling the TTS engine again.
+
+    Args:
+        directory (str | Path): Where audio files are stored.
+        max_bytes (int): Size cap before least recently used files are evicted.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 ** 2):
+        self.store = DiskLRUCache(directory, max_bytes=max_bytes)
+
+    def key(self, engine, language, text):
+        normalized = " ".join(text.split())
+        return cache_key("audio", engine, language.lower(), normalized)
+
+    def link_to(self, key, destination):
+        return self.store.link_to(key, destination)
+
+    def put(self, key, source):
+        self.store.put_file(key, source)
+
+    def stats(self):
+        return self.store.stats()
+
+
+class LLMResponseCache:
+    """
+    Opt-in cache of LLM completions keyed by model name, prompt and
+    generation options. Only worth enabling when Ollama runs with a fixed
+    seed/temperature, where identical prompts give identical answers.
+
+    Entries live in an in-memory LRU of `max_entries` and, depending on
+    `backend`, are also persisted so they survive restarts:
+    "memory" (no persistence), "disk" (DiskLRUCache under `directory`) or
+    "mongo" (LLMCacheEntry documents, expired by a MongoDB TTL index).
+
+    Args:
+        backend (str): "memory", "disk" or "mongo".
+        ttl (float): Seconds an entry stays valid.
+        max_entries (int): Size of the in-memory LRU.
+        directory (str | Path): Storage for the "disk" backend.
+        max_bytes (int): Size cap for the "disk" backend.
+    """
+    BACKENDS = ("memory", "disk", "mongo")
+
+    def __init__(self, backend="memory", ttl=86400, max_entries=1000, directory="cache/llm", max_bytes=64 * 1024 ** 2):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown LLM cache backend '{backend}'. Choose from: {', '.join(self.BACKENDS)}")
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.store = DiskLRUCache(directory, max_bytes=max_bytes, suffix=".json") if backend == "disk" else None
+
+    def key(self, model, prompt, options=None):
+        return cache_key("llm", model, prompt, options or {})
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        response, expires_at = self._load(key)
+        with self._lock:
+            if response is None or expires_at <= now:
+                self.entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, expires_at, response)
+        return response
+
+    def put(self, key, model, response):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, response)
+        if self.backend == "disk":
+            self.store.put_bytes(key, json.dumps({"expires_at": expires_at, "response": response}).encode("utf-8"))
+        elif self.backend == "mongo":
+            from models.models import LLMCacheEntry
+            LLMCacheEntry.objects(key=key).update_one(
+                set__model=model,
+                set__response=response,
+                set__created_at=datetime.utcnow(),
+                set__expires_at=datetime.utcnow() + timedelta(seconds=self.ttl),
+                upsert=True,
+            )
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.backend,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "entries_in_memory": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+            }
+
+    def _remember(self, key, expires_at, response):
+        self.entries[key] = (expires_at, response)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _load(self, key):
+        """Reads an entry from the persistent backend; returns (response, expires_at)."""
+        if self.backend == "disk":
+            path = self.store.get(key)
+            if path is not None:
+                try:
+                    entry = json.loads(path.read_text(encoding="utf-8"))
+                    return entry["response"], entry["expires_at"]
+                except (OSError, ValueError, KeyError):
+                    pass
+        elif self.backend == "mongo":
+            from models.models import LLMCacheEntry
+            entry = LLMCacheEntry.objects(key=key).first()
+            if entry is not None:
+                return entry.response, (entry.expires_at - datetime.utcnow()).total_seconds() + time.time()
+        return None, 0
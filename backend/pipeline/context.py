@@ -0,0 +1,106 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Literal, Optional, get_args
+
+# LLM stages whose model can be chosen separately (see `StoryMaker.model_for`)
+LLMStage = Literal["idea", "validation", "title", "scenes", "image_prompts", "plan"]
+LLM_STAGES = get_args(LLMStage)
+
+
+def check_stages(stages):
+    """
+    Raises:
+        ValueError: If `stages` names a stage not in `LLM_STAGES`.
+    """
+    unknown = set(stages) - set(LLM_STAGES)
+    if unknown:
+        raise ValueError(f"Unknown LLM stages {sorted(unknown)}. Choose from: {', '.join(LLM_STAGES)}")
+
+
+def parse_stage_models(spec):
+    """
+    Parses a "stage=model,stage=model" string, e.g.
+    "title=llama3.2:1b,image_prompts=llama3.2:1b", into a dict.
+
+    Raises:
+        ValueError: If an entry is not "stage=model" or names an unknown stage.
+    """
+    models = {}
+    for entry in filter(None, (part.strip() for part in (spec or "").split(","))):
+        stage, sep, model = (part.strip() for part in entry.partition("="))
+        if not sep or not model:
+            raise ValueError(f"Invalid stage model '{entry}', expected '<stage>=<model>'")
+        check_stages([stage])
+        models[stage] = model
+    return models
+
+
+@dataclass
+class GenerationContext:
+    """
+    Per-story generation settings passed through every StoryMaker stage.
+
+    Keeping these off the StoryMaker instance lets one StoryMaker (and its
+    shared diffusion pipeline) serve many stories concurrently.
+
+    Attributes:
+        genre (str): The genre of the story (e.g., fantasy, sci-fi).
+        num_scenes (int): Number of scenes to generate.
+        voice (str): Narration voice as "<language>" or "<engine>:<language>",
+            e.g. "en" or "espeak:en" (see `pipeline.tts`).
+        seed (int | None): Seed for image generation and the LLM; None for random.
+        validation (str): "off" skips idea validation, "background" validates
+            after the story is returned and stores the result on the Story,
+            "gate" validates up front and regenerates ideas scoring below
+            `min_validation_score`.
+        min_validation_score (int): Lowest acceptable creativity/relevance
+            score (1-10) in "gate" mode.
+        max_idea_attempts (int): Ideas to try in "gate" mode before keeping
+            the best one.
+        stream_scenes (bool): Stream the scene breakdown and start image
+            prompts and media for each scene as soon as it is written.
+        planner (bool): Ask the LLM for the idea, title, scenes and image
+            prompts in one JSON response instead of one call per stage,
+            falling back to the per-stage calls if the plan is invalid.
+        encoding_profile (str): Video encoding profile, e.g. "preview" or
+            "final" (see `pipeline.video.ENCODING_PROFILES`).
+        stage_models (dict[str, str]): Model per LLM stage for this story,
+            overriding the StoryMaker's; keys are from `LLM_STAGES`.
+        bypass_llm_cache (bool): Always query the LLM, even when the response
+            cache is enabled, for when creative variety is wanted.
+        progress (ProgressStream | None): Receives progress events, if set.
+    """
+    VALIDATION_MODES = ("off", "background", "gate")
+
+    genre: str = "fantasy"
+    num_scenes: int = 5
+    voice: str = "en"
+    seed: Optional[int] = None
+    validation: str = "background"
+    min_validation_score: int = 6
+    max_idea_attempts: int = 3
+    stream_scenes: bool = False
+    planner: bool = False
+    encoding_profile: str = "standard"
+    stage_models: Dict[str, str] = field(default_factory=dict)
+    bypass_llm_cache: bool = False
+    progress: Optional[Any] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.genre = self.genre.strip().lower()
+        if self.validation not in self.VALIDATION_MODES:
+            raise ValueError(
+                f"Unknown validation mode '{self.validation}'. Choose from: {', '.join(self.VALIDATION_MODES)}"
+            )
+        self.stage_models = dict(self.stage_models or {})
+        check_stages(self.stage_models)
+
+    def emit(self, event, **data):
+        """Reports a progress event to `progress`, if any."""
+        if self.progress is not None:
+            self.progress.emit(event, **data)
+
+    def scene_seed(self, scene_num):
+        """Returns a stable per-scene seed derived from the story seed."""
+        if self.seed is None:
+            return None
+        return self.seed + scene_num
@@ -0,0 +1,155 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .model_loader import ModelLoader
+
+
+class ImageBatcher:
+    """
+    Micro-batching scheduler for a shared diffusion pipeline.
+
+    Prompts submitted from any thread are collected for up to `max_wait_ms`
+    (or until `max_batch_size` are waiting) and run through the pipeline in a
+    single call. Each caller gets a Future resolving to its own PIL image, so
+    results route back to the scene that asked for them.
+
+    Args:
+        pipe: A diffusers text-to-image pipeline, or a `ModelLoader` that
+            yields one. Prompts submitted while the loader is still loading
+            stay queued until the pipeline is ready.
+        max_batch_size (int): Max prompts per pipeline call; caps memory use.
+        max_wait_ms (float): How long to hold the first prompt of a batch
+            waiting for more to arrive. Trades latency for throughput.
+        num_inference_steps (int): Denoising steps per image.
+        guidance_scale (float): Classifier-free guidance scale.
+        cache (ImageCache | None): Serves repeated prompts without rendering.
+        model_id (str): Model identifier used in cache keys.
+    """
+
+    def __init__(
+        self,
+        pipe,
+        max_batch_size=4,
+        max_wait_ms=50,
+        num_inference_steps=1,
+        guidance_scale=0.0,
+        cache=None,
+        model_id="stabilityai/sdxl-turbo",
+    ):
+        self.pipe = pipe
+        self.cache = cache
+        self.model_id = model_id
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.num_inference_steps = num_inference_steps
+        self.guidance_scale = guidance_scale
+        self.requests = queue.Queue()
+        self.stats = {"batches": 0, "images": 0, "max_batch": 0}
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def submit(self, prompt, seed=None):
+        """
+        Queues one prompt and returns a Future for its image. A cache hit is
+        read and decoded on the calling thread, so async callers should use
+        `asyncio.to_thread`.
+        """
+        future = Future()
+        if self.cache is not None:
+            image = self.cache.get(self.cache_key(prompt, seed))
+            if image is not None:
+                future.set_result(image)
+                return future
+        self._ensure_started()
+        self.requests.put((prompt, seed, future))
+        return future
+
+    def cache_key(self, prompt, seed):
+        return self.cache.key(
+            self.model_id, prompt, self.num_inference_steps, self.guidance_scale, seed
+        )
+
+    def generate(self, prompts, seeds=None):
+        """Blocking helper that renders a list of prompts, in order."""
+        seeds = seeds or [None] * len(prompts)
+        futures = [self.submit(p, s) for p, s in zip(prompts, seeds)]
+        return [f.result() for f in futures]
+
+    def _ensure_started(self):
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="image-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self.requests.get()]
+        if isinstance(self.pipe, ModelLoader) and not self.pipe.ready:
+            # Keep queueing while the model loads; the first batch picks up everything waiting
+            try:
+                self.pipe.wait()
+            except RuntimeError:
+                pass
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self.requests.get(timeout=remaining))
+                else:
+                    batch.append(self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [item for item in self._collect() if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            prompts = [prompt for prompt, _, _ in batch]
+            seeds = [seed for _, seed, _ in batch]
+            try:
+                images = self._render(self._get_pipe(), prompts, seeds)
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.stats["batches"] += 1
+            self.stats["images"] += len(batch)
+            self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+            for (_, _, future), image in zip(batch, images):
+                future.set_result(image)
+            if self.cache is not None:
+                for (prompt, seed, _), image in zip(batch, images):
+                    try:
+                        self.cache.put(self.cache_key(prompt, seed), image)
+                    except Exception as e:
+                        print(f"Failed to cache image: {e}")
+
+    def _get_pipe(self):
+        if isinstance(self.pipe, ModelLoader):
+            return self.pipe.wait()
+        return self.pipe
+
+    def _render(self, pipe, prompts, seeds):
+        # Imported here so the API can bind before torch has loaded (see api.load_pipeline)
+        import torch
+
+        generators = None
+        if any(seed is not None for seed in seeds):
+            # Unseeded prompts batched with seeded ones still get a random seed of their own
+            generators = [
+                torch.Generator("cpu").manual_seed(
+                    seed if seed is not None else int(torch.randint(0, 2**31, (1,)))
+                )
+                for seed in seeds
+            ]
+        return pipe(
+            prompt=prompts,
+            num_inference_steps=self.num_inference_steps,
+            guidance_scale=self.guidance_scale,
+            generator=generators,
+        ).images
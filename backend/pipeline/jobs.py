@@ -0,0 +1,122 @@
+import asyncio
+import uuid
+from datetime import datetime
+
+from models.models import Job
+from .progress import ProgressStream
+
+
+class JobQueue:
+    """
+    Bounded pool of asyncio workers that run story generation jobs.
+
+    Jobs are persisted as `Job` documents so their status survives a reload;
+    any job left "queued" or "running" by a previous process is re-queued
+    when the workers start. Progress events of jobs run by this process are
+    kept in memory for `progress_ttl` seconds after the job finishes.
+    MongoDB calls run on worker threads so they never block the event loop
+    the job workers share with the API.
+
+    Args:
+        runner: Coroutine function called as `await runner(params, progress)`
+            that returns the result dict stored on the completed job.
+        num_workers (int): Maximum number of jobs running at once.
+        progress_ttl (float): Seconds to keep a finished job's events.
+    """
+
+    def __init__(self, runner, num_workers=1, progress_ttl=600):
+        self.runner = runner
+        self.num_workers = max(1, num_workers)
+        self.progress_ttl = progress_ttl
+        self.queue = asyncio.Queue()
+        # Queued job IDs in order, for `position`
+        self.queued = []
+        self.workers = []
+        self.progress = {}
+
+    async def start(self):
+        if self.workers:
+            return
+        unfinished = await asyncio.to_thread(
+            lambda: list(Job.objects(status__in=["queued", "running"]).order_by("created_at"))
+        )
+        for job in unfinished:
+            if job.status == "running":
+                print(f"Re-queueing interrupted job {job.job_id}")
+                await asyncio.to_thread(job.update, set__status="queued", unset__started_at=True)
+            self.progress[job.job_id] = ProgressStream()
+            self._enqueue(job.job_id)
+        self.workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.num_workers)
+        ]
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def submit(self, params):
+        job_id = str(uuid.uuid4())
+        await asyncio.to_thread(Job(job_id=job_id, status="queued", params=params).save)
+        self.progress[job_id] = ProgressStream()
+        self.progress[job_id].emit("queued", job_id=job_id)
+        self._enqueue(job_id)
+        return job_id
+
+    async def get(self, job_id):
+        return await asyncio.to_thread(lambda: Job.objects(job_id=job_id).first())
+
+    def position(self, job_id):
+        """Returns the 1-based queue position of a queued job, or None."""
+        try:
+            return self.queued.index(job_id) + 1
+        except ValueError:
+            return None
+
+    def _enqueue(self, job_id):
+        self.queued.append(job_id)
+        self.queue.put_nowait(job_id)
+
+    async def _worker(self, worker_num):
+        while True:
+            job_id = await self.queue.get()
+            self.queued.remove(job_id)
+            try:
+                await self._run(job_id)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job_id):
+        job = await self.get(job_id)
+        if job is None or job.status != "queued":
+            return
+        await asyncio.to_thread(job.update, set__status="running", set__started_at=datetime.utcnow())
+        progress = self.progress.setdefault(job_id, ProgressStream())
+        progress.emit("running", job_id=job_id)
+        print(f"▶️ Running job {job_id}")
+        try:
+            result = await self.runner(dict(job.params), progress)
+        except asyncio.CancelledError:
+            # Awaiting could be cancelled again during shutdown, so write synchronously
+            job.update(set__status="queued", unset__started_at=True)
+            raise
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            await asyncio.to_thread(
+                job.update,
+                set__status="failed",
+                set__error=str(e),
+                set__finished_at=datetime.utcnow(),
+            )
+            progress.emit("failed", job_id=job_id, error=str(e))
+        else:
+            await asyncio.to_thread(
+                job.update,
+                set__status="completed",
+                set__result=result,
+                set__finished_at=datetime.utcnow(),
+            )
+            progress.emit("completed", job_id=job_id, metadata=result)
+            print(f"✅ Job {job_id} completed")
+        asyncio.get_running_loop().call_later(self.progress_ttl, self.progress.pop, job_id, None)
@@ -0,0 +1,177 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+
+
+class LLMBackend:
+    """
+    One Ollama endpoint and its circuit breaker state.
+
+    The circuit is "closed" while the endpoint works, "open" for
+    `cooldown` seconds after repeated failures (no requests are routed to
+    it), and "half_open" once the cooldown has passed, when a single trial
+    request decides whether it closes again.
+    """
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial_in_flight = False
+        # Whether a failed health check, rather than failed requests, opened the circuit
+        self.opened_by_probe = False
+        self.requests = 0
+        self.errors = 0
+
+    def state(self, now=None):
+        if not self.open_until:
+            return "closed"
+        return "open" if (now or time.monotonic()) < self.open_until else "half_open"
+
+
+class LLMRouter:
+    """
+    Spreads LLM requests over several Ollama endpoints.
+
+    Each request goes to the available endpoint with the fewest requests in
+    flight. After `failure_threshold` consecutive failures an endpoint's
+    circuit opens for `cooldown` seconds; health checks (see
+    `AsyncOllamaClient.check_health`) can open circuits between requests,
+    but only close the ones they opened. Thread-safe, since
+    `AsyncOllamaClient` can be used from more than one event loop.
+
+    Args:
+        urls (list[str]): Ollama server URLs, e.g. ["http://ollama:11434"].
+        failure_threshold (int): Consecutive failures that open a circuit.
+        cooldown (float): Seconds an open circuit rejects requests.
+    """
+
+    def __init__(self, urls, failure_threshold=3, cooldown=30):
+        if isinstance(urls, str):
+            urls = [urls]
+        urls = [url.strip() for url in urls if url and url.strip()]
+        if not urls:
+            raise ValueError("LLMRouter needs at least one URL")
+        self.backends = [LLMBackend(url) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Picks the endpoint for the next request and counts it as in flight.
+        If every circuit is open, the one closest to the end of its cooldown
+        is used rather than failing outright.
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [
+                backend for backend in self.backends
+                if backend.state(now) == "closed"
+                or (backend.state(now) == "half_open" and not backend.trial_in_flight)
+            ]
+            if candidates:
+                backend = min(candidates, key=lambda b: b.outstanding)
+            else:
+                backend = min(self.backends, key=lambda b: b.open_until)
+            if backend.state(now) == "half_open":
+                backend.trial_in_flight = True
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def release(self, backend, ok):
+        """
+        Records the outcome of a request started with `acquire`; `ok=None`
+        (e.g. a cancelled request) leaves the circuit as it is.
+        """
+        with self._lock:
+            backend.outstanding -= 1
+            backend.trial_in_flight = False
+            if ok:
+                self._close(backend)
+            elif ok is False:
+                backend.errors += 1
+                self._fail(backend)
+
+    @contextmanager
+    def lease(self):
+        """
+        Context manager around `acquire`/`release`. The request counts as
+        failed if the body raises; call `.fail()` on the lease to report a
+        failure without raising (e.g. on a 5xx status).
+        """
+        lease = _Lease(self.acquire())
+        try:
+            yield lease
+        except (asyncio.CancelledError, GeneratorExit):
+            # The caller gave up, which says nothing about the endpoint
+            self.release(lease.backend, ok=None)
+            raise
+        except BaseException:
+            self.release(lease.backend, ok=False)
+            raise
+        self.release(lease.backend, ok=lease.ok)
+
+    def mark_health(self, backend, healthy):
+        """
+        Applies a health check result to an endpoint's circuit.
+
+        A passing check closes a circuit only if a failed check opened it. A
+        circuit opened by failed requests goes to half_open instead, so a
+        real request still has to succeed: /api/tags can answer while
+        generation is broken (e.g. the GPU is out of memory).
+        """
+        with self._lock:
+            if healthy:
+                if backend.opened_by_probe:
+                    print(f"LLM backend {backend.url} is healthy again")
+                    self._close(backend)
+                elif backend.state() == "open":
+                    backend.open_until = time.monotonic()
+            elif backend.state() != "open":
+                # An endpoint that fails its health check gets no more traffic
+                backend.failures = self.failure_threshold - 1
+                self._fail(backend, probe=True)
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return [
+                {
+                    "url": backend.url,
+                    "state": backend.state(now),
+                    "outstanding": backend.outstanding,
+                    "requests": backend.requests,
+                    "errors": backend.errors,
+                }
+                for backend in self.backends
+            ]
+
+    def _close(self, backend):
+        backend.failures = 0
+        backend.open_until = 0.0
+        backend.opened_by_probe = False
+
+    def _fail(self, backend, probe=False):
+        backend.failures += 1
+        if backend.failures >= self.failure_threshold or backend.state() == "half_open":
+            if backend.state() == "closed":
+                print(f"Opening circuit for LLM backend {backend.url} for {self.cooldown}s")
+            backend.open_until = time.monotonic() + self.cooldown
+            backend.opened_by_probe = probe
+
+
+class _Lease:
+    def __init__(self, backend):
+        self.backend = backend
+        self.ok = True
+
+    @property
+    def url(self):
+        return self.backend.url
+
+    def fail(self):
+        self.ok = False
@@ -0,0 +1,83 @@
+import threading
+import time
+
+
+class ModelLoader:
+    """
+    Loads a model on a background thread so the server can start answering
+    requests (and health checks) while the weights are still loading.
+
+    Args:
+        load_fn: Callable taking this loader and returning the loaded model.
+            It may call `set_stage` to report progress.
+        name (str): Human-readable model name used in status reports.
+    """
+
+    def __init__(self, load_fn, name):
+        self.load_fn = load_fn
+        self.name = name
+        self.state = "pending"
+        self.stage = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._model = None
+        self._done = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.state = "loading"
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._load, name=f"load-{self.name}", daemon=True)
+            self._thread.start()
+
+    def set_stage(self, stage):
+        print(f"[{self.name}] {stage}...")
+        self.stage = stage
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def wait(self, timeout=None):
+        """
+        Blocks until the model is loaded and returns it.
+
+        Raises:
+            TimeoutError: If the model is not loaded within `timeout` seconds.
+            RuntimeError: If loading failed.
+        """
+        self.start()
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"{self.name} is still loading")
+        if self.state == "failed":
+            raise RuntimeError(f"{self.name} failed to load: {self.error}")
+        return self._model
+
+    def status(self):
+        end = self.finished_at or time.time()
+        return {
+            "model": self.name,
+            "state": self.state,
+            "stage": self.stage,
+            "elapsed_seconds": round(end - self.started_at, 1) if self.started_at else None,
+            "error": self.error,
+        }
+
+    def _load(self):
+        try:
+            self._model = self.load_fn(self)
+            self.state = "ready"
+            self.stage = None
+            print(f"[{self.name}] loaded!")
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            print(f"[{self.name}] failed to load: {e}")
+        finally:
+            self.finished_at = time.time()
+            self._done.set()
@@ -0,0 +1,249 @@
+import asyncio
+import json
+import random
+import re
+import time
+import weakref
+
+import httpx
+
+from .llm_router import LLMRouter
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+
+
+def duration_seconds(value):
+    """
+    Converts an Ollama keep_alive value (seconds, or a Go duration such as
+    "30m" or "1h30m") to seconds.
+
+    Raises:
+        ValueError: If the value is not a number or a duration.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = value.strip()
+    sign = -1 if text.startswith("-") else 1
+    text = text.lstrip("+-")
+    parts = DURATION_PART.findall(text)
+    if not parts or "".join(number + unit for number, unit in parts) != text:
+        raise ValueError(f"Invalid duration '{value}'")
+    return sign * sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+
+
+class OllamaRequestError(Exception):
+    """Raised when Ollama rejects a request (4xx, e.g. an unknown model); retrying won't help."""
+
+    def __init__(self, status_code, message):
+        super().__init__(f"Ollama returned {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+    @classmethod
+    def from_response(cls, response):
+        try:
+            message = response.json().get("error")
+        except ValueError:
+            message = None
+        return cls(response.status_code, message or response.text)
+
+
+class AsyncOllamaClient:
+    """
+    Pooled, asyncio-native client for the Ollama generate API, built on httpx.
+
+    One client (and its connection pool) is shared by every story a
+    StoryMaker produces, so LLM calls reuse TCP connections, and an
+    in-flight generation costs a coroutine instead of an OS thread. httpx
+    clients are bound to the event loop they were created on, so one is
+    kept per loop.
+
+    Args:
+        router (LLMRouter | str): Router over the Ollama servers to use, or
+            a single server URL, e.g. "http://ollama:11434".
+        max_retries (int): Attempts per request before giving up; each
+            attempt is routed separately, so retries can reach another server.
+        pool_size (int): Max pooled connections per server; match Ollama's
+            OLLAMA_NUM_PARALLEL so requests don't queue client-side.
+        connect_timeout (float): Seconds to wait for a connection.
+        read_timeout (float): Seconds to wait for a generation to finish.
+        backoff_base (float): First retry delay in seconds, doubled per attempt.
+        backoff_max (float): Upper bound for a single retry delay.
+        keep_alive (str | int | None): How long Ollama keeps the model loaded
+            after each request, e.g. "30m", or seconds (-1 keeps it loaded
+            forever). None uses the server default (5 minutes).
+    """
+
+    # Ollama's own keep_alive when a request doesn't set one
+    DEFAULT_KEEP_ALIVE = 300
+
+    def __init__(
+        self,
+        router,
+        max_retries=3,
+        pool_size=4,
+        connect_timeout=5,
+        read_timeout=300,
+        backoff_base=1.0,
+        backoff_max=30.0,
+        keep_alive=None,
+    ):
+        self.router = router if isinstance(router, LLMRouter) else LLMRouter([router])
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Ollama reads bare numbers as seconds but rejects them as strings
+        if isinstance(keep_alive, str) and keep_alive.lstrip("-").isdigit():
+            keep_alive = int(keep_alive)
+        self.keep_alive = keep_alive
+        # time.monotonic() of the last request, for keep-warm pings
+        self.last_used = 0.0
+        max_connections = self.pool_size * len(self.router.backends)
+        self.limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        )
+        self.timeout = httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+        self._clients = weakref.WeakKeyDictionary()
+
+    def keep_alive_seconds(self):
+        """Seconds Ollama keeps a model loaded after a request; None if forever."""
+        keep_alive = self.DEFAULT_KEEP_ALIVE if self.keep_alive is None else self.keep_alive
+        seconds = duration_seconds(keep_alive)
+        return None if seconds < 0 else seconds
+
+    def backoff(self, attempt):
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def build_payload(self, model, prompt, options=None, stream=False, format=None):
+        payload = {"model": model, "prompt": prompt, "stream": stream}
+        if options:
+            payload["options"] = options
+        if format:
+            # "json" constrains the model to emit a single valid JSON value
+            payload["format"] = format
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def load_payload(self, model):
+        # A request without a prompt only loads the model and resets its keep_alive timer
+        return self.build_payload(model, "")
+
+    @staticmethod
+    def server_error(status_code):
+        # 4xx (e.g. an unknown model) is the caller's fault, not the server's
+        return status_code >= 500
+
+    def client(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._clients:
+            self._clients[loop] = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+        return self._clients[loop]
+
+    async def generate(self, model, prompt, options=None, format=None):
+        payload = self.build_payload(model, prompt, options, format=format)
+        self.last_used = time.monotonic()
+        for attempt in range(self.max_retries):
+            rejected = None
+            try:
+                with self.router.lease() as backend:
+                    response = await self.client().post(f"{backend.url}/api/generate", json=payload)
+                    if response.status_code == 200:
+                        return response.json()["response"].strip()
+                    if not self.server_error(response.status_code):
+                        rejected = OllamaRequestError.from_response(response)
+                    else:
+                        backend.fail()
+                        print(f"Attempt {attempt+1}: {backend.url} returned {response.status_code}")
+            except Exception as e:
+                print(f"Attempt {attempt+1}: Error {e!r}")
+            if rejected:
+                raise rejected
+            if attempt + 1 < self.max_retries:
+                await asyncio.sleep(self.backoff(attempt))
+        raise Exception("Failed to get response from Ollama after retries.")
+
+    async def stream(self, model, prompt, options=None):
+        """
+        Yields response text chunks from Ollama's NDJSON stream as they are
+        generated. Connection failures and 5xx statuses are retried until
+        the first chunk arrives; errors after that are raised.
+
+        Raises:
+            OllamaRequestError: If Ollama rejects the request (4xx).
+        """
+        payload = self.build_payload(model, prompt, options, stream=True)
+        self.last_used = time.monotonic()
+        for attempt in range(self.max_retries):
+            rejected = None
+            try:
+                with self.router.lease() as backend:
+                    async with self.client().stream("POST", f"{backend.url}/api/generate", json=payload) as response:
+                        if response.status_code == 200:
+                            async for line in response.aiter_lines():
+                                if not line.strip():
+                                    continue
+                                chunk = json.loads(line)
+                                if chunk.get("error"):
+                                    raise Exception(f"Ollama stream error: {chunk['error']}")
+                                yield chunk.get("response", "")
+                                if chunk.get("done"):
+                                    break
+                            return
+                        if not self.server_error(response.status_code):
+                            await response.aread()
+                            rejected = OllamaRequestError.from_response(response)
+                        else:
+                            backend.fail()
+                            print(f"Attempt {attempt+1}: {backend.url} returned {response.status_code}")
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                print(f"Attempt {attempt+1}: Error {e!r}")
+            if rejected:
+                raise rejected
+            if attempt + 1 < self.max_retries:
+                await asyncio.sleep(self.backoff(attempt))
+        raise Exception("Failed to get response from Ollama after retries.")
+
+    async def warm_up(self, model):
+        """Loads `model` into the memory of every Ollama server without generating anything."""
+        self.last_used = time.monotonic()
+
+        async def load(backend):
+            response = await self.client().post(f"{backend.url}/api/generate", json=self.load_payload(model))
+            response.raise_for_status()
+
+        results = await asyncio.gather(*(load(b) for b in self.router.backends), return_exceptions=True)
+        errors = [e for e in results if isinstance(e, BaseException)]
+        if errors:
+            raise errors[0]
+
+    async def check_health(self, timeout=5):
+        """
+        Probes every server's /api/tags endpoint and opens or closes its
+        circuit in the router accordingly.
+        """
+        async def probe(backend):
+            try:
+                response = await self.client().get(f"{backend.url}/api/tags", timeout=timeout)
+                healthy = response.status_code == 200
+            except httpx.HTTPError:
+                healthy = False
+            self.router.mark_health(backend, healthy)
+
+        await asyncio.gather(*(probe(b) for b in self.router.backends))
+
+    async def monitor_health(self, interval):
+        """Runs `check_health` every `interval` seconds until cancelled."""
+        while True:
+            await self.check_health()
+            await asyncio.sleep(interval)
+
+    async def aclose(self):
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
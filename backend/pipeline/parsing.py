@@ -0,0 +1,190 @@
+import re
+
+NUMBER_WORDS = {
+    word: num for num, word in enumerate(
+        "one two three four five six seven eight nine ten eleven twelve "
+        "thirteen fourteen fifteen sixteen seventeen eighteen nineteen twenty".split(),
+        start=1,
+    )
+}
+# Markdown decoration LLMs put around labels: headings, bold, italics, quotes, bullets
+_DECORATION = r"[ \t>#*_`-]*"
+_TRAILING = r"[ \t*_`]*"
+
+# "Scene 1: ...", "**Scene 1** - ...", "### Scene #1.", "Scene One: ...",
+# "Scene 1 (The Opening): ...", "Scene 1" alone on a line
+SCENE_HEADER = re.compile(
+    rf"^{_DECORATION}scene[ \t]*#?[ \t]*(\d+|{'|'.join(NUMBER_WORDS)})\b"
+    rf"{_TRAILING}(?:\(([^()\n]*)\){_TRAILING})?"
+    rf"(?:[:.)–—-]{_TRAILING}(.*)|$)$",
+    re.IGNORECASE | re.MULTILINE,
+)
+# "1. ...", "2) ...", fallback when the model drops the word "Scene"
+LIST_HEADER = re.compile(
+    rf"^{_DECORATION}(\d+){_TRAILING}[.):]{_TRAILING}(.*)$",
+    re.MULTILINE,
+)
+DESCRIPTION_LABEL = re.compile(
+    rf"^{_DECORATION}description{_TRAILING}[:–—-]{_TRAILING}",
+    re.IGNORECASE | re.MULTILINE,
+)
+SUMMARY_LABEL = re.compile(
+    rf"^{_DECORATION}(?:summary|title){_TRAILING}[:–—-]{_TRAILING}",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def _clean(text):
+    """Collapses whitespace and strips surrounding markdown."""
+    return " ".join(text.split()).strip("*_`# ")
+
+
+def _header_rest(match):
+    """Text after a header's number; a parenthetical title stands in for an empty rest."""
+    if match.re is LIST_HEADER:
+        return match.group(2)
+    return match.group(3) or match.group(2) or ""
+
+
+def _scene_number(token):
+    return int(token) if token.isdigit() else NUMBER_WORDS[token.lower()]
+
+
+def split_numbered(text):
+    """
+    Splits text into numbered sections in a single pass.
+
+    Recognizes "Scene N" headers with any common numbering, markdown or
+    whitespace variant, and falls back to plain "N." list items when no
+    such header is present. The first section with a given number wins.
+
+    Returns:
+        dict[int, tuple[str, str]]: Number -> (rest of the header line, body).
+    """
+    headers = list(SCENE_HEADER.finditer(text)) or list(LIST_HEADER.finditer(text))
+    sections = {}
+    for i, match in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        num = _scene_number(match.group(1))
+        sections.setdefault(num, (_header_rest(match), text[match.end():end]))
+    return sections
+
+
+def parse_scenes(scenes_text):
+    """
+    Parses scene blocks such as "Scene N: <summary>\\nDescription: <description>".
+
+    The "Description:" label is optional: without it the header line is the
+    summary and everything below it the description. Scenes without a
+    description are left out, so they show up in `missing_scenes`.
+
+    Returns:
+        list[dict]: One dict per scene with "scene", "summary" and
+        "description", ordered by scene number.
+    """
+    scenes = []
+    for num, (rest, body) in sorted(split_numbered(scenes_text).items()):
+        label = DESCRIPTION_LABEL.search(body)
+        if label:
+            summary = _clean(rest) or _clean(SUMMARY_LABEL.sub("", body[:label.start()]))
+            description = _clean(body[label.end():])
+        else:
+            summary = _clean(SUMMARY_LABEL.sub("", rest))
+            description = _clean(body)
+        if not description:
+            continue
+        if not summary:
+            summary = re.split(r"(?<=[.!?])\s", description, maxsplit=1)[0]
+        scenes.append({"scene": num, "summary": summary, "description": description})
+    return scenes
+
+
+def parse_numbered_items(text):
+    """
+    Parses "Scene N: <text>" items (e.g. image prompts) with the same
+    tolerance as `parse_scenes`.
+
+    Returns:
+        dict[int, str]: Number -> text, for items with non-empty text.
+    """
+    items = {}
+    for num, (rest, body) in split_numbered(text).items():
+        item = _clean(f"{rest} {body}")
+        if item:
+            items[num] = item
+    return items
+
+
+# "(1-10)", "1 to 10": the rating scale, not a rating
+SCORE_RANGE = re.compile(r"\(?\b[01]\s*(?:-|–|to)\s*10\b\)?", re.IGNORECASE)
+_SCORE = r"(\d+(?:\.\d+)?)"
+SCORE_LABELS = ("creativity", "relevance")
+# "4/10 for creativity", "7/10 creativity"; not "7/10 Relevance: 6/10", where the label starts a new score
+RATED_LABEL = re.compile(
+    rf"{_SCORE}[ \t]*(?:/[ \t]*10|out of 10)[ \t]+(?:(?:for|on|in)[ \t]+)?(?:its[ \t]+|the[ \t]+)?"
+    rf"({'|'.join(SCORE_LABELS)})(?![ \t*_]*[:=])",
+    re.IGNORECASE,
+)
+
+
+def parse_validation_scores(validation):
+    """
+    Reads the creativity and relevance ratings (1-10) out of an idea critique.
+
+    "<N>/10 [for] <label>" is tried first, then the first number following
+    the label, e.g. "Creativity (1-10): 8" or "relevance: 7 out of 10".
+    Numbers already claimed by a "<N>/10 <label>" are skipped by the
+    fallback, so one label's score is never read as the other's.
+
+    Returns:
+        tuple: (creativity, relevance); None where a score was not found.
+    """
+    text = SCORE_RANGE.sub(" ", validation)
+    rated = {}
+    for match in RATED_LABEL.finditer(text):
+        rated.setdefault(match.group(2).lower(), match.group(1))
+    rest = RATED_LABEL.sub(" ", text)
+    scores = []
+    for label in SCORE_LABELS:
+        score = rated.get(label)
+        if score is None:
+            match = re.search(rf"{label}[^0-9\n]{{0,40}}?{_SCORE}", rest, re.IGNORECASE)
+            score = match.group(1) if match else None
+        scores.append(min(10, round(float(score))) if score is not None else None)
+    return tuple(scores)
+
+
+def missing_scenes(scenes, num_scenes):
+    """Returns the scene numbers from 1 to `num_scenes` that `scenes` lacks."""
+    present = {scene["scene"] for scene in scenes}
+    return [num for num in range(1, num_scenes + 1) if num not in present]
+
+
+class IncrementalSceneParser:
+    """
+    Parses scenes out of an LLM response while it is still streaming.
+
+    A scene is only emitted once the next scene header has arrived (or the
+    stream is closed), so its description is known to be complete.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.emitted = set()
+
+    def feed(self, chunk):
+        """Adds streamed text and returns any scenes completed by it."""
+        self.text += chunk
+        headers = list(SCENE_HEADER.finditer(self.text)) or list(LIST_HEADER.finditer(self.text))
+        if not headers:
+            return []
+        return self._new_scenes(self.text[:headers[-1].start()])
+
+    def close(self):
+        """Returns the scenes still pending once the stream has ended."""
+        return self._new_scenes(self.text)
+
+    def _new_scenes(self, text):
+        scenes = [s for s in parse_scenes(text) if s["scene"] not in self.emitted]
+        self.emitted.update(s["scene"] for s in scenes)
+        return scenes
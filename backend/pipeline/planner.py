@@ -0,0 +1,87 @@
+import json
+
+PLAN_EXAMPLE = {
+    "idea": "<2-3 sentence story idea>",
+    "title": "<compelling title>",
+    "scenes": [
+        {
+            "scene": 1,
+            "summary": "<one-sentence summary>",
+            "description": "<a few sentences describing the setting and events, within 50 words>",
+            "image_prompt": "<highly detailed, cinematic prompt for AI art generation>",
+        }
+    ],
+}
+SCENE_FIELDS = ("summary", "description", "image_prompt")
+
+
+class PlanError(ValueError):
+    """Raised when an LLM story plan does not match the expected schema."""
+
+
+def parse_plan(raw, num_scenes):
+    """
+    Validates a JSON story plan and normalizes it.
+
+    Scenes are renumbered 1..N in the order given, since the model's own
+    numbering is not trusted.
+
+    Args:
+        raw (str): The model's JSON response.
+        num_scenes (int): Number of scenes the plan must contain.
+
+    Returns:
+        dict: "idea", "title", "scenes" (list of dicts with "scene",
+        "summary" and "description") and "image_prompts" (scene number ->
+        prompt).
+
+    Raises:
+        PlanError: If the response is not valid JSON or misses a field.
+    """
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise PlanError(f"Plan is not valid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise PlanError("Plan is not a JSON object")
+
+    plan = {}
+    for field in ("idea", "title"):
+        value = data.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise PlanError(f"Plan is missing '{field}'")
+        plan[field] = value.strip()
+
+    scenes = data.get("scenes")
+    if not isinstance(scenes, list):
+        raise PlanError("Plan is missing 'scenes'")
+    if len(scenes) < num_scenes:
+        raise PlanError(f"Plan has {len(scenes)} scenes, expected {num_scenes}")
+
+    plan["scenes"] = []
+    plan["image_prompts"] = {}
+    for num, scene in enumerate(scenes[:num_scenes], start=1):
+        if not isinstance(scene, dict):
+            raise PlanError(f"Scene {num} is not a JSON object")
+        values = {}
+        for field in SCENE_FIELDS:
+            value = scene.get(field)
+            if not isinstance(value, str) or not value.strip():
+                raise PlanError(f"Scene {num} is missing '{field}'")
+            values[field] = value.strip()
+        plan["scenes"].append(
+            {"scene": num, "summary": values["summary"], "description": values["description"]}
+        )
+        plan["image_prompts"][num] = values["image_prompt"]
+    return plan
+
+
+def format_scenes(scenes):
+    """Renders scenes in the "Scene N: ...\\nDescription: ..." text format."""
+    return "\n\n".join(
+        f"Scene {s['scene']}: {s['summary']}\nDescription: {s['description']}" for s in scenes
+    )
+
+
+def format_image_prompts(image_prompts):
+    return "\n".join(f"Scene {num}: {prompt}" for num, prompt in sorted(image_prompts.items()))
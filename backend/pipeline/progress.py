@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import time
+
+
+class ProgressStream:
+    """
+    Ordered log of progress events for one story, with live async subscribers.
+
+    `emit` may be called from any thread (media stages run on worker
+    threads); subscribers first receive every event emitted so far and then
+    each new one, until a terminal event ("completed" or "failed").
+    """
+    TERMINAL_EVENTS = ("completed", "failed")
+
+    def __init__(self):
+        self.events = []
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return bool(self.events) and self.events[-1]["event"] in self.TERMINAL_EVENTS
+
+    def emit(self, event, **data):
+        with self._lock:
+            message = {"id": len(self.events), "event": event, "time": time.time(), "data": data}
+            self.events.append(message)
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+            except RuntimeError:
+                # Subscriber's event loop has already closed
+                pass
+
+    async def subscribe(self, after=None):
+        """
+        Yields past and future events, ending after a terminal event. Events
+        with an id up to `after` (the last one a client saw) are skipped.
+        """
+        queue = asyncio.Queue()
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            history = list(self.events)
+            self._subscribers.add(subscriber)
+        try:
+            for message in history:
+                if after is None or message["id"] > after:
+                    yield message
+                if message["event"] in self.TERMINAL_EVENTS:
+                    return
+            while True:
+                message = await queue.get()
+                if message["id"] < len(history):
+                    continue
+                yield message
+                if message["event"] in self.TERMINAL_EVENTS:
+                    return
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
@@ -0,0 +1,103 @@
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+
+class ScenePipeline:
+    """
+    Streams each scene of a story through image -> narration -> clip render.
+
+    Every stage has its own workers, so while one scene is being diffused
+    others are narrated and encoded (on the StoryMaker's shared narration
+    and encode pools). A scene's clip is encoded as soon as both its image
+    and its audio exist, and `finish` joins the clips in scene order without
+    re-encoding. End-to-end time approaches the slowest stage instead of the
+    sum of all stages.
+
+    Args:
+        maker (StoryMaker): Provides the image batcher and the narration and
+            rendering steps.
+        ctx (GenerationContext): Settings of the story being rendered.
+        output_folder (Path): Folder receiving scene images, audio and clips.
+    """
+
+    def __init__(self, maker, ctx, output_folder):
+        self.maker = maker
+        self.ctx = ctx
+        self.output_folder = Path(output_folder)
+        self.clips = {}
+
+    def submit(self, scene, image_prompt):
+        """
+        Starts processing one scene. Safe to call while earlier scenes are
+        still running. Image cache hits are read and decoded here, so call it
+        from a worker thread rather than the event loop.
+        """
+        scene_num = scene["scene"]
+        if not image_prompt:
+            print(f"Missing image prompt for Scene {scene_num}")
+            return
+
+        print(f"🎨 Generating image for Scene {scene_num}...")
+        image_future = self.maker.image_batcher.submit(image_prompt, self.ctx.scene_seed(scene_num))
+        audio_future = self.maker.narration_pool.submit(
+            self.maker.narrate_scene, scene, self.output_folder, self.ctx
+        )
+        self.clips[scene_num] = self._when_all(
+            [image_future, audio_future], self._render, scene_num, image_future, audio_future
+        )
+
+    def finish(self, output_path):
+        """Waits for every submitted scene and joins their clips into `output_path`."""
+        clip_paths = []
+        for scene_num in sorted(self.clips):
+            try:
+                clip_path = self.clips[scene_num].result()
+            except Exception as e:
+                print(f"Failed to render Scene {scene_num}: {e}")
+                continue
+            if clip_path:
+                clip_paths.append(clip_path)
+
+        if not clip_paths:
+            print("No scenes found for video.")
+            return None
+        return self.maker.concatenate_clips(clip_paths, output_path)
+
+    def _render(self, scene_num, image_future, audio_future):
+        img_path = self.output_folder / f"scene_{scene_num}.png"
+        image_future.result().save(img_path)
+        self.ctx.emit("image", scene=scene_num, path=str(img_path))
+
+        audio_path = audio_future.result()
+        if audio_path is None:
+            print(f"Missing audio for Scene {scene_num}")
+            return None
+
+        clip_path = self.maker.scene_clip_path(self.output_folder, scene_num, self.ctx.encoding_profile)
+        self.maker.render_scene_clip(img_path, audio_path, clip_path, self.ctx.encoding_profile)
+        self.ctx.emit("clip", scene=scene_num, path=str(clip_path))
+        return clip_path
+
+    def _when_all(self, futures, fn, *args):
+        """Runs `fn(*args)` on the encode pool once all `futures` are done."""
+        result = Future()
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def copy_outcome(done):
+            if done.exception() is not None:
+                result.set_exception(done.exception())
+            else:
+                result.set_result(done.result())
+
+        def on_done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            self.maker.encode_pool.submit(fn, *args).add_done_callback(copy_outcome)
+
+        for future in futures:
+            future.add_done_callback(on_done)
+        return result
@@ -0,0 +1,65 @@
+import asyncio
+
+
+class StageGraph:
+    """
+    Tiny dependency graph of async stages.
+
+    Each stage starts as soon as all of the stages it depends on have
+    finished, so independent stages (e.g. the title and the scene breakdown,
+    which both only need the story idea) run concurrently.
+
+    Example:
+        graph = StageGraph()
+        graph.add("idea", make_idea)
+        graph.add("title", make_title, deps=["idea"])
+        results = await graph.run()   # {"idea": ..., "title": ...}
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, name, fn, deps=()):
+        """
+        Registers a stage.
+
+        Args:
+            name (str): Stage name; its result is stored under this key.
+            fn: Coroutine function called with the results of `deps` as
+                keyword arguments.
+            deps (list[str]): Names of the stages this one needs.
+        """
+        self.stages[name] = (fn, tuple(deps))
+        return self
+
+    async def run(self):
+        """
+        Runs every stage and returns a dict of stage name -> result.
+
+        Raises:
+            ValueError: If a stage depends on an unknown stage.
+            Exception: The first stage failure; other stages are cancelled.
+        """
+        for name, (_, deps) in self.stages.items():
+            missing = [dep for dep in deps if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Stage '{name}' depends on unknown stages: {missing}")
+
+        tasks = {}
+
+        async def run_stage(name):
+            fn, deps = self.stages[name]
+            results = await asyncio.gather(*(tasks[dep] for dep in deps))
+            return await fn(**dict(zip(deps, results)))
+
+        for name in self.stages:
+            tasks[name] = asyncio.ensure_future(run_stage(name))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return {name: task.result() for name, task in tasks.items()}
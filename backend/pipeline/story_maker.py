@@ -1,21 +1,35 @@
-import requests
+import asyncio
+import json
 import re
 import uuid
 import time
 import os
+import random
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from diffusers import StableDiffusionXLPipeline
-import torch
-from PIL import Image
-from gtts import gTTS
-from moviepy import ImageClip, AudioFileClip, concatenate_videoclips, CompositeVideoClip
 
 from models.models import Story, Scene
+from .context import GenerationContext, check_stages
+from .image_batcher import ImageBatcher
+from .scene_pipeline import ScenePipeline
+from .stage_graph import StageGraph
+from .parsing import (
+    IncrementalSceneParser,
+    missing_scenes,
+    parse_numbered_items,
+    parse_scenes,
+    parse_validation_scores,
+)
+from .planner import PLAN_EXAMPLE, PlanError, format_image_prompts, format_scenes, parse_plan
+from .tts import TTS_BACKENDS, parse_voice
+from .ollama_client import AsyncOllamaClient
+from .llm_router import LLMRouter
+from .video import concat_clips, get_encoding_profile, render_still_clip
 
 hf_token = os.getenv("HUGGINGFACE_TOKEN")
 
 class StoryMaker:
-    OLLAMA_URL = "http://ollama:11434/api/generate"
+    OLLAMA_URL = "http://ollama:11434"
     MODEL_NAME = "llama2"
 
     def __init__(
@@ -24,6 +38,25 @@ class StoryMaker:
         genre="fantasy",
         num_scenes=5,
         max_retries=3,
+        model_name=None,
+        stage_models=None,
+        allowed_models=None,
+        ollama_urls=None,
+        llm_failure_threshold=3,
+        llm_cooldown=30,
+        image_batch_size=4,
+        image_batcher=None,
+        narration_workers=8,
+        tts_timeout=30,
+        default_tts_engine="gtts",
+        ollama_pool_size=4,
+        ollama_connect_timeout=5,
+        ollama_read_timeout=300,
+        ollama_keep_alive=None,
+        audio_cache=None,
+        llm_cache=None,
+        still_fps=1,
+        encode_workers=None,
         # model_id="stabilityai/sdxl-turbo",
         # model_id="runwayml/stable-diffusion-v1-5",
         output_dir="story_outputs",
@@ -34,108 +67,347 @@ class StoryMaker:
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.pipe = pipe
+        # All diffusion calls go through the batcher, which owns the (shared) pipeline
+        self.image_batcher = image_batcher or ImageBatcher(pipe, max_batch_size=image_batch_size, max_wait_ms=0)
+        # TTS is pure network wait, so narration for all scenes runs concurrently on a bounded pool
+        self.narration_pool = ThreadPoolExecutor(max_workers=narration_workers, thread_name_prefix="narrate")
+        self.tts_timeout = tts_timeout
+        self.default_tts_engine = default_tts_engine
+        self.tts_backends = {}
+        self.audio_cache = audio_cache
+        self.llm_cache = llm_cache
+        # Scenes are static images, so a frame or two per second is all the video needs
+        self.still_fps = still_fps
+        # Each encode is its own ffmpeg process, so a thread per job is enough to use every core
+        self.encode_pool = ThreadPoolExecutor(
+            max_workers=encode_workers or os.cpu_count() or 1, thread_name_prefix="encode"
+        )
+        self.background_tasks = set()
+        if model_name:
+            self.MODEL_NAME = model_name
+        # e.g. {"title": "llama3.2:1b"}; stages not listed use MODEL_NAME
+        self.stage_models = dict(stage_models or {})
+        check_stages(self.stage_models)
+        # Models a request may pick besides the configured ones; anything else could
+        # make Ollama pull or load an arbitrary model
+        self.extra_allowed_models = set(allowed_models or ())
+        # Routes every LLM call, so all stories share load and circuit state
+        self.llm_router = LLMRouter(
+            ollama_urls or [self.OLLAMA_URL],
+            failure_threshold=llm_failure_threshold,
+            cooldown=llm_cooldown,
+        )
+        ollama_settings = dict(
+            max_retries=max_retries,
+            pool_size=ollama_pool_size,
+            connect_timeout=ollama_connect_timeout,
+            read_timeout=ollama_read_timeout,
+            keep_alive=ollama_keep_alive,
+        )
+        self.async_ollama = AsyncOllamaClient(self.llm_router, **ollama_settings)
+
+    def default_context(self, voice="en"):
+        return GenerationContext(genre=self.genre, num_scenes=self.num_scenes, voice=voice)
 
     # === LLaMA2 utils ===
-    def query_llama2(self, prompt):
-        for attempt in range(self.max_retries):
+    def llm_options(self, ctx, attempt=0):
+        return {"seed": ctx.seed + attempt} if ctx.seed is not None else {}
+
+    def use_llm_cache(self, ctx, attempt=0):
+        # Without a seed, a retry has to reach the model to get a different answer
+        return (
+            self.llm_cache is not None
+            and not ctx.bypass_llm_cache
+            and (attempt == 0 or ctx.seed is not None)
+        )
+
+    def model_for(self, stage, ctx):
+        """Model for an LLM stage: the request's choice, then the configured one, then MODEL_NAME."""
+        return ctx.stage_models.get(stage) or self.stage_models.get(stage) or self.MODEL_NAME
+
+    def configured_models(self):
+        return sorted({self.MODEL_NAME, *self.stage_models.values()})
+
+    def allowed_models(self):
+        return sorted({*self.configured_models(), *self.extra_allowed_models})
+
+    def check_stage_models(self, stage_models):
+        """
+        Raises:
+            ValueError: If a per-request stage model is not in `allowed_models`.
+        """
+        disallowed = set(stage_models.values()) - set(self.allowed_models())
+        if disallowed:
+            raise ValueError(
+                f"Models {sorted(disallowed)} are not allowed. Choose from: {', '.join(self.allowed_models())}"
+            )
+
+    async def aquery_llama2(self, prompt, options=None, use_cache=False, model=None):
+        model = model or self.MODEL_NAME
+        if not use_cache:
+            return await self.async_ollama.generate(model, prompt, options)
+        key = self.llm_cache.key(model, prompt, options)
+        response = await asyncio.to_thread(self.llm_cache.get, key)
+        if response is None:
+            response = await self.async_ollama.generate(model, prompt, options)
+            await asyncio.to_thread(self.llm_cache.put, key, model, response)
+        return response
+
+    async def aask(self, prompt, ctx, attempt=0, stage=None):
+        return await self.aquery_llama2(
+            prompt, self.llm_options(ctx, attempt), self.use_llm_cache(ctx, attempt), self.model_for(stage, ctx)
+        )
+
+    async def awarm_up(self):
+        """
+        Loads every configured LLM so the first story after startup doesn't
+        wait for them. Ollama only keeps as many loaded at once as
+        OLLAMA_MAX_LOADED_MODELS and memory allow.
+        """
+        for model in self.configured_models():
+            start = time.time()
             try:
-                response = requests.post(
-                    self.OLLAMA_URL,
-                    json={"model": self.MODEL_NAME, "prompt": prompt, "stream": False},
-                )
-                if response.status_code == 200:
-                    return response.json()["response"].strip()
-                else:
-                    print(f"Attempt {attempt+1}: Ollama returned {response.status_code}")
+                await self.async_ollama.warm_up(model)
+                print(f"🔥 {model} warm in {time.time() - start:.1f}s")
             except Exception as e:
-                print(f"Attempt {attempt+1}: Error {e}")
-            time.sleep(2)
-        raise Exception("Failed to get response from Ollama after retries.")
-
-    # === Story generation pieces ===
-    def generate_story_idea(self):
-        prompt = (
-            f"Give me one unique, original short story idea in the {self.genre} genre. "
-            f"Keep it 2-3 sentences and strongly reflect the tone of {self.genre}."
+                print(f"Warm-up of {model} failed: {e!r}")
+
+    def default_keep_warm_interval(self):
+        """
+        Idle seconds before a keep-warm ping: 80% of keep_alive, so the ping
+        lands before Ollama unloads the model. 0 (no pings) if keep_alive
+        keeps models loaded forever.
+        """
+        keep_alive = self.async_ollama.keep_alive_seconds()
+        return 0 if keep_alive is None else keep_alive * 0.8
+
+    async def akeep_warm(self, interval):
+        """
+        Pings the LLM whenever no request has reached it for `interval`
+        seconds, so Ollama doesn't unload it during quiet periods. Runs
+        until cancelled.
+        """
+        while True:
+            idle = time.monotonic() - self.async_ollama.last_used
+            if idle >= interval:
+                await self.awarm_up()
+                idle = 0
+            await asyncio.sleep(interval - idle)
+
+    # === Prompts ===
+    def story_idea_prompt(self, ctx):
+        return (
+            f"Give me one unique, original short story idea in the {ctx.genre} genre. "
+            f"Keep it 2-3 sentences and strongly reflect the tone of {ctx.genre}."
         )
-        return self.query_llama2(prompt)
 
-    def validate_story(self, idea):
-        prompt = (
-            f"Rate this {self.genre} story idea for creativity and relevance (1-10 each) and explain why:\n\n{idea}"
+    def validation_prompt(self, idea, ctx):
+        return (
+            f"Rate this {ctx.genre} story idea for creativity and relevance (1-10 each) and explain why:\n\n{idea}"
         )
-        return self.query_llama2(prompt)
 
-    def generate_title(self, story_idea):
-        prompt = (
-            f"Based on this story idea from the {self.genre} genre, give me a compelling title. "
+    def title_prompt(self, story_idea, ctx):
+        return (
+            f"Based on this story idea from the {ctx.genre} genre, give me a compelling title. "
             f"Return only the title:\n\n{story_idea}"
         )
-        return self.query_llama2(prompt)
 
-    def generate_scenes(self, story_idea):
-        prompt = (
-            f"Break the following {self.genre} story into {self.num_scenes} detailed scenes.\n"
+    def scenes_prompt(self, story_idea, ctx):
+        return (
+            f"Break the following {ctx.genre} story into {ctx.num_scenes} detailed scenes.\n"
             f"Format each like this:\nScene 1: <one-sentence summary>\n"
             f"Description: <a few sentences describing the setting and events>\n"
             f"Keep each description within 50 words.\n"
-            f"Reflect the tone and aesthetic of {self.genre}.\n\n"
+            f"Reflect the tone and aesthetic of {ctx.genre}.\n\n"
             f"{story_idea}"
         )
-        return self.query_llama2(prompt)
 
-    def parse_scenes(self, scenes_text):
-        pattern = r"Scene\s*(\d+):\s*(.*?)\nDescription:\s*(.*?)(?=\nScene\s*\d+:|\Z)"
-        matches = re.findall(pattern, scenes_text, re.DOTALL)
-        scenes = [
-            {"scene": int(num), "summary": summary.strip(), "description": description.strip()}
-            for num, summary, description in matches
-        ]
-        return scenes
+    def missing_scenes_prompt(self, story_idea, scenes, missing, ctx):
+        numbers = ", ".join(str(num) for num in missing)
+        return (
+            f"The following {ctx.genre} story is being broken into {ctx.num_scenes} scenes, "
+            f"but scenes {numbers} are missing. Write only scenes {numbers}.\n"
+            f"Format each like this:\nScene {missing[0]}: <one-sentence summary>\n"
+            f"Description: <a few sentences describing the setting and events>\n"
+            f"Keep each description within 50 words.\n\n"
+            f"Story: {story_idea}\n\n"
+            f"Scenes so far:\n{format_scenes(scenes)}"
+        )
 
-    def generate_image_prompts(self, scenes):
+    def image_prompts_prompt(self, scenes, ctx):
         descriptions = "\n".join([f"Scene {s['scene']}: {s['description']}" for s in scenes])
-        prompt = (
-            f"Convert the following {self.genre} scene descriptions into highly detailed, cinematic prompts for AI art generation. "
+        return (
+            f"Convert the following {ctx.genre} scene descriptions into highly detailed, cinematic prompts for AI art generation. "
             f"Use terms like 'ultra-detailed', '8K', 'cinematic lighting', 'concept art style'. "
             f"Return one prompt per scene, in the format:\nScene X: <prompt>\n\n{descriptions}"
         )
-        raw_prompts = self.query_llama2(prompt)
-        pattern = r"Scene\s*(\d+):\s*(.*?)(?=\nScene\s*\d+:|\Z)"
-        matches = re.findall(pattern, raw_prompts, re.DOTALL)
-        prompts = {int(num): text.strip() for num, text in matches}
+
+    def image_prompt_prompt(self, scene, ctx):
+        return (
+            f"Convert the following {ctx.genre} scene description into a highly detailed, cinematic prompt for AI art generation. "
+            f"Use terms like 'ultra-detailed', '8K', 'cinematic lighting', 'concept art style'. "
+            f"Return only the prompt:\n\n{scene['description']}"
+        )
+
+    def story_plan_prompt(self, ctx):
+        return (
+            f"Plan one unique, original short story in the {ctx.genre} genre, told in {ctx.num_scenes} scenes. "
+            f"Respond with JSON only, shaped exactly like this:\n{json.dumps(PLAN_EXAMPLE, indent=2)}\n"
+            f"Include exactly {ctx.num_scenes} scenes. "
+            f"Image prompts should use terms like 'ultra-detailed', '8K', 'cinematic lighting', 'concept art style'. "
+            f"Strongly reflect the tone and aesthetic of {ctx.genre}."
+        )
+
+    # === Parsing ===
+    def parse_scenes(self, scenes_text):
+        return parse_scenes(scenes_text)
+
+    def parse_validation_scores(self, validation):
+        return parse_validation_scores(validation)
+
+    def parse_image_prompts(self, raw_prompts):
+        return parse_numbered_items(raw_prompts)
+
+    # === Async story generation pieces ===
+    async def agenerate_story_idea(self, ctx, attempt=0):
+        return await self.aask(self.story_idea_prompt(ctx), ctx, attempt, stage="idea")
+
+    async def avalidate_story(self, idea, ctx):
+        return await self.aask(self.validation_prompt(idea, ctx), ctx, stage="validation")
+
+    async def agenerate_title(self, story_idea, ctx):
+        return await self.aask(self.title_prompt(story_idea, ctx), ctx, stage="title")
+
+    async def agenerate_scenes(self, story_idea, ctx):
+        return await self.aask(self.scenes_prompt(story_idea, ctx), ctx, stage="scenes")
+
+    async def astream_scenes(self, story_idea, ctx, parser):
+        """
+        Streams the scene breakdown and yields each scene as soon as it has
+        been fully written. The raw text accumulates in `parser.text`.
+        """
+        async for chunk in self.async_ollama.stream(
+            self.model_for("scenes", ctx), self.scenes_prompt(story_idea, ctx), self.llm_options(ctx)
+        ):
+            for scene in parser.feed(chunk):
+                yield scene
+        for scene in parser.close():
+            yield scene
+
+    async def agenerate_image_prompt(self, scene, ctx):
+        return await self.aask(self.image_prompt_prompt(scene, ctx), ctx, stage="image_prompts")
+
+    async def agenerate_image_prompts(self, scenes, ctx):
+        raw_prompts = await self.aask(self.image_prompts_prompt(scenes, ctx), ctx, stage="image_prompts")
+        prompts = self.parse_image_prompts(raw_prompts)
+        # Re-prompt per scene for whatever the batch answer left out
+        missing = [scene for scene in scenes if not prompts.get(scene["scene"])]
+        if missing:
+            print(f"Image prompts missing for scenes {[s['scene'] for s in missing]}, re-prompting for those...")
+            extra = await asyncio.gather(*(self.agenerate_image_prompt(scene, ctx) for scene in missing))
+            extra = {scene["scene"]: prompt for scene, prompt in zip(missing, extra)}
+            prompts.update(extra)
+            raw_prompts = f"{raw_prompts}\n{format_image_prompts(extra)}"
         return prompts, raw_prompts
 
+    async def arepair_scenes(self, story_idea, scenes, ctx):
+        """
+        Asks only for the scenes missing from a parsed breakdown instead of
+        regenerating the whole story. Returns (new scenes, raw response);
+        scenes still missing afterwards are reported and skipped.
+        """
+        missing = missing_scenes(scenes, ctx.num_scenes)
+        if not missing:
+            return [], ""
+        print(f"Scenes {missing} missing or malformed, re-prompting for those...")
+        raw_repair = await self.aask(
+            self.missing_scenes_prompt(story_idea, scenes, missing, ctx), ctx, stage="scenes"
+        )
+        repaired = [scene for scene in parse_scenes(raw_repair) if scene["scene"] in missing]
+        still_missing = missing_scenes(scenes + repaired, ctx.num_scenes)
+        if still_missing:
+            print(f"Scenes {still_missing} could not be repaired and will be skipped")
+        return repaired, raw_repair
+
+    async def aplan_story(self, ctx):
+        """
+        Asks for the whole story plan in one JSON-constrained call. Returns
+        the parsed plan, or None if the model's answer does not fit the
+        schema, so the caller can fall back to one call per stage.
+        """
+        prompt = self.story_plan_prompt(ctx)
+        options = self.llm_options(ctx)
+        model = self.model_for("plan", ctx)
+        # Cached by hand so a plan that fails validation is never stored
+        key = None
+        if self.use_llm_cache(ctx):
+            key = self.llm_cache.key(model, prompt, {**options, "format": "json"})
+            raw = await asyncio.to_thread(self.llm_cache.get, key)
+            if raw is not None:
+                return parse_plan(raw, ctx.num_scenes)
+
+        raw = await self.async_ollama.generate(model, prompt, options, format="json")
+        try:
+            plan = parse_plan(raw, ctx.num_scenes)
+        except PlanError as e:
+            print(f"Story plan rejected, falling back to per-stage generation: {e}")
+            return None
+        if key is not None:
+            await asyncio.to_thread(self.llm_cache.put, key, model, raw)
+        return plan
+
     # === Media generation ===
-    def generate_images_and_audio(self, image_prompts, scenes, output_folder, voice="en"):
-        for scene in scenes:
-            scene_num = scene["scene"]
-            prompt = image_prompts.get(scene_num)
-            description = scene.get("description", "").strip()
-
-            # Image
-            print(f"🎨 Generating image for Scene {scene_num}...")
+    def get_tts_backend(self, voice):
+        engine, language = parse_voice(voice, self.default_tts_engine)
+        if engine not in self.tts_backends:
+            self.tts_backends[engine] = TTS_BACKENDS[engine](timeout=self.tts_timeout)
+        return self.tts_backends[engine], language
+
+    def narrate_scene(self, scene, output_folder, ctx):
+        scene_num = scene["scene"]
+        description = scene.get("description", "").strip()
+        if not description:
+            return None
+        backend, language = self.get_tts_backend(ctx.voice)
+        audio_path = Path(output_folder) / f"scene_{scene_num}{backend.extension}"
+        if audio_path.exists():
+            ctx.emit("audio", scene=scene_num, path=str(audio_path))
+            return audio_path
+
+        cache_key = None
+        if self.audio_cache is not None:
+            cache_key = self.audio_cache.key(backend.name, language, description)
+            if self.audio_cache.link_to(cache_key, audio_path):
+                print(f"🔊 Narration for Scene {scene_num} served from cache")
+                ctx.emit("audio", scene=scene_num, path=str(audio_path), cached=True)
+                return audio_path
+
+        print(f"🔊 Narrating Scene {scene_num} with {backend.name}...")
+        for attempt in range(self.max_retries):
             try:
-                image = self.pipe(prompt, num_inference_steps=1, guidance_scale=0.0).images[0]
-                img_path = Path(output_folder) / f"scene_{scene_num}.png"
-                image.save(img_path)
+                backend.synthesize(description, audio_path, language)
+                if cache_key is not None:
+                    self.audio_cache.put(cache_key, audio_path)
+                ctx.emit("audio", scene=scene_num, path=str(audio_path))
+                return audio_path
             except Exception as e:
-                print(f"Failed to generate image for Scene {scene_num}: {e}")
-
-            # Audio
-            if description:
-                mp3_path = Path(output_folder) / f"scene_{scene_num}.mp3"
-                if not mp3_path.exists():
-                    print(f"🔊 Narrating Scene {scene_num}...")
-                    try:
-                        tts = gTTS(text=description, lang=voice)
-                        tts.save(str(mp3_path))
-                    except Exception as e:
-                        print(f"Failed to generate audio for Scene {scene_num}: {e}")
+                print(f"Scene {scene_num} narration attempt {attempt+1}: Error {e}")
+                audio_path.unlink(missing_ok=True)
+                if attempt + 1 < self.max_retries:
+                    # Full jitter, so scenes failing together don't retry in lockstep
+                    time.sleep(random.uniform(0, 2 ** attempt))
+        print(f"Failed to generate audio for Scene {scene_num}")
+        return None
 
     # === Video creation ===
-    def create_video_for_project(self, project_folder, output_path):
-        scenes = []
+    def create_video_for_project(self, project_folder, output_path, encoding_profile="standard"):
+        """
+        Builds the video of an existing story folder. Scene clips of the same
+        encoding profile that are newer than their image and audio are
+        reused, so after re-rendering a single scene only that scene's
+        segment is encoded again.
+        """
+        clips = []
         scene_nums = sorted(
             int(f.name.split("_")[1].split(".")[0])
             for f in project_folder.iterdir()
@@ -144,31 +416,68 @@ class StoryMaker:
 
         for scene_num in scene_nums:
             img_path = project_folder / f"scene_{scene_num}.png"
-            audio_path = project_folder / f"scene_{scene_num}.mp3"
-            if not audio_path.exists():
+            audio_path = next(
+                (
+                    project_folder / f"scene_{scene_num}{backend.extension}"
+                    for backend in TTS_BACKENDS.values()
+                    if (project_folder / f"scene_{scene_num}{backend.extension}").exists()
+                ),
+                None,
+            )
+            if audio_path is None:
                 print(f"Missing audio for Scene {scene_num}")
                 continue
 
-            audio_clip = AudioFileClip(str(audio_path))
-            img_clip = ImageClip(str(img_path), duration=audio_clip.duration)
-            video_clip = CompositeVideoClip([img_clip])
-            video_clip.audio = audio_clip
-            scenes.append(video_clip)
-
-        if not scenes:
+            clip_path = self.scene_clip_path(project_folder, scene_num, encoding_profile)
+            if clip_path.exists() and clip_path.stat().st_mtime >= max(
+                img_path.stat().st_mtime, audio_path.stat().st_mtime
+            ):
+                clips.append(clip_path)
+            else:
+                clips.append(self.encode_pool.submit(
+                    self.render_scene_clip, img_path, audio_path, clip_path, encoding_profile
+                ))
+
+        if not clips:
             print("No scenes found for video.")
             return None
 
-        final_clip = concatenate_videoclips(scenes, method="compose")
-        final_clip.write_videofile(str(output_path), fps=24)
-        return output_path
+        clip_paths = [clip if isinstance(clip, Path) else clip.result() for clip in clips]
+        return self.concatenate_clips(clip_paths, output_path)
+
+    def scene_clip_path(self, folder, scene_num, encoding_profile):
+        # Clips of different profiles differ in size and frame rate, so they
+        # must never be reused for (or joined with) another profile's
+        return Path(folder) / f"scene_{scene_num}.{encoding_profile}.mp4"
+
+    def render_scene_clip(self, img_path, audio_path, output_path, encoding_profile="standard"):
+        print(f"🎬 Rendering {Path(output_path).name} ({encoding_profile})...")
+        return render_still_clip(
+            img_path, audio_path, output_path,
+            fps=self.still_fps, profile=get_encoding_profile(encoding_profile),
+        )
+
+    def concatenate_clips(self, clip_paths, output_path):
+        print(f"🎞️ Joining {len(clip_paths)} clips into {Path(output_path).name}...")
+        return concat_clips(clip_paths, output_path)
 
     # === Utilities ===
     def sanitize_filename(self, title):
         return re.sub(r'[\\/*?:"<>|]', "_", title)
 
+    def create_output_folder(self, title):
+        # Stories can run concurrently, so never share a folder with another story
+        folder_name = self.sanitize_filename(title)
+        output_folder = self.output_dir / folder_name
+        try:
+            output_folder.mkdir(parents=True)
+        except FileExistsError:
+            output_folder = self.output_dir / f"{folder_name}_{uuid.uuid4().hex[:8]}"
+            output_folder.mkdir(parents=True)
+        return output_folder
+
     # === Mongo save ===
-    def save_story_to_mongo(self, title, idea, scenes, raw_scenes_text, image_prompts, raw_image_prompts, output_folder):
+    def save_story_to_mongo(self, title, idea, scenes, raw_scenes_text, image_prompts, raw_image_prompts, output_folder, ctx, validation=None):
         story_id = str(uuid.uuid4())[:8]
 
         # Ensure all image_prompts keys are strings
@@ -184,7 +493,7 @@ class StoryMaker:
         story_doc = Story(
             story_id=story_id,
             title=title,
-            genre=self.genre,
+            genre=ctx.genre,
             story_idea=idea,
             raw_scenes_text=raw_scenes_text,
             scenes=scene_docs,
@@ -192,43 +501,241 @@ class StoryMaker:
             raw_image_prompts=raw_image_prompts,
             folder=str(output_folder)
         )
+        if validation:
+            story_doc.validation = validation
+            story_doc.creativity_score, story_doc.relevance_score = self.parse_validation_scores(validation)
         story_doc.save()
         return story_doc
 
-    # === Full pipeline ===
-    def create_story(self, voice="en"):
-        print("Generating story idea...")
-        story_idea = self.generate_story_idea()
-
-        print("Validating story idea...")
-        validation = self.validate_story(story_idea)
-        print(f"Validation result:\n{validation}\n")
-
-        print("Generating title...")
-        title = self.generate_title(story_idea)
-
-        print("Generating scenes...")
-        raw_scenes = self.generate_scenes(story_idea)
-        scenes = self.parse_scenes(raw_scenes)
+    def save_validation_to_mongo(self, story_id, validation):
+        creativity, relevance = self.parse_validation_scores(validation)
+        Story.objects(story_id=story_id).update_one(
+            set__validation=validation,
+            set__creativity_score=creativity,
+            set__relevance_score=relevance,
+        )
 
-        print("Generating image prompts...")
-        image_prompts, raw_image_prompts = self.generate_image_prompts(scenes)
+    # === Full pipeline ===
+    def build_story_graph(self, ctx, plan=None, gated=None):
+        """
+        Stages of a story up to the start of media generation. Title and scene
+        breakdown only need the idea, so they run concurrently once it exists.
+        In "gate" validation mode the idea stage keeps regenerating until the
+        idea scores well enough. With `ctx.stream_scenes`, each scene is handed
+        to the media stage as soon as the LLM has written it and its image
+        prompt is ready, while later scenes are still being generated.
+        Given a `plan` (see `aplan_story`), the text stages take their results
+        from it instead of calling the LLM. In "gate" mode the accepted idea's
+        critique is stored in the `gated` dict under "validation"; the other
+        modes validate after the story is saved (see `acreate_story`).
+        """
+        plan = dict(plan or {})
+        gated = {} if gated is None else gated
+        streamed = asyncio.Queue()
+        prompt_tasks = {}
+
+        async def idea():
+            if ctx.validation == "gate":
+                gated["idea"], gated["validation"] = await self.agenerate_validated_idea(ctx, plan.get("idea"))
+                if gated["idea"] != plan.get("idea"):
+                    # The planned title and scenes belong to a rejected idea
+                    plan.clear()
+                ctx.emit("idea", story_idea=gated["idea"], validation=gated["validation"])
+                return gated["idea"]
+            if plan:
+                ctx.emit("idea", story_idea=plan["idea"])
+                return plan["idea"]
+            print("Generating story idea...")
+            story_idea = await self.agenerate_story_idea(ctx)
+            ctx.emit("idea", story_idea=story_idea)
+            return story_idea
+
+        async def title(idea):
+            print("Generating title...")
+            story_title = plan["title"] if plan else await self.agenerate_title(idea, ctx)
+            ctx.emit("title", title=story_title)
+            return story_title
+
+        async def scenes(idea):
+            if plan:
+                for scene in plan["scenes"]:
+                    ctx.emit("scene", **scene)
+                if ctx.stream_scenes:
+                    for scene in plan["scenes"]:
+                        streamed.put_nowait((scene, plan["image_prompts"].get(scene["scene"])))
+                    streamed.put_nowait(None)
+                return format_scenes(plan["scenes"]), plan["scenes"]
+
+            print("Generating scenes...")
+            if not ctx.stream_scenes:
+                raw_scenes = await self.agenerate_scenes(idea, ctx)
+                parsed = self.parse_scenes(raw_scenes)
+                repaired, raw_repair = await self.arepair_scenes(idea, parsed, ctx)
+                if repaired:
+                    parsed = sorted(parsed + repaired, key=lambda scene: scene["scene"])
+                    raw_scenes = f"{raw_scenes}\n\n{raw_repair}"
+                for scene in parsed:
+                    ctx.emit("scene", **scene)
+                return raw_scenes, parsed
+
+            async def prompt_for(scene):
+                prompt = await self.agenerate_image_prompt(scene, ctx)
+                ctx.emit("image_prompt", scene=scene["scene"], prompt=prompt)
+                streamed.put_nowait((scene, prompt))
+                return prompt
+
+            parser = IncrementalSceneParser()
+            parsed = []
+            try:
+                async for scene in self.astream_scenes(idea, ctx, parser):
+                    print(f"Scene {scene['scene']} written, generating its image prompt...")
+                    parsed.append(scene)
+                    ctx.emit("scene", **scene)
+                    prompt_tasks[scene["scene"]] = asyncio.create_task(prompt_for(scene))
+                repaired, raw_repair = await self.arepair_scenes(idea, parsed, ctx)
+                for scene in repaired:
+                    parsed.append(scene)
+                    ctx.emit("scene", **scene)
+                    prompt_tasks[scene["scene"]] = asyncio.create_task(prompt_for(scene))
+                await asyncio.gather(*prompt_tasks.values())
+            finally:
+                streamed.put_nowait(None)
+            raw_scenes = f"{parser.text}\n\n{raw_repair}" if repaired else parser.text
+            return raw_scenes, sorted(parsed, key=lambda scene: scene["scene"])
+
+        async def image_prompts(scenes):
+            if plan:
+                for num, prompt in sorted(plan["image_prompts"].items()):
+                    ctx.emit("image_prompt", scene=num, prompt=prompt)
+                return plan["image_prompts"], format_image_prompts(plan["image_prompts"])
+            if not ctx.stream_scenes:
+                print("Generating image prompts...")
+                prompts, raw_prompts = await self.agenerate_image_prompts(scenes[1], ctx)
+                for num, prompt in sorted(prompts.items()):
+                    ctx.emit("image_prompt", scene=num, prompt=prompt)
+                return prompts, raw_prompts
+            prompts = {num: task.result() for num, task in prompt_tasks.items()}
+            return prompts, format_image_prompts(prompts)
+
+        async def media(title, **upstream):
+            output_folder = self.create_output_folder(title)
+            scene_pipeline = ScenePipeline(self, ctx, output_folder)
+            # submit reads the image cache from disk, so keep it off the event loop
+            if not ctx.stream_scenes:
+                prompts = upstream["image_prompts"][0]
+
+                def submit_all():
+                    for scene in upstream["scenes"][1]:
+                        scene_pipeline.submit(scene, prompts.get(scene["scene"]))
+
+                await asyncio.to_thread(submit_all)
+                return output_folder, scene_pipeline
+
+            while (item := await streamed.get()) is not None:
+                await asyncio.to_thread(scene_pipeline.submit, *item)
+            return output_folder, scene_pipeline
+
+        media_deps = ["title"] if ctx.stream_scenes else ["title", "scenes", "image_prompts"]
+        return (
+            StageGraph()
+            .add("idea", idea)
+            .add("title", title, deps=["idea"])
+            .add("scenes", scenes, deps=["idea"])
+            .add("image_prompts", image_prompts, deps=["scenes"])
+            .add("media", media, deps=media_deps)
+        )
 
-        folder_name = self.sanitize_filename(title)
-        output_folder = Path("story_outputs") / folder_name
-        output_folder.mkdir(parents=True, exist_ok=True)
+    async def agenerate_validated_idea(self, ctx, candidate=None):
+        """
+        Generates ideas until one scores at least `ctx.min_validation_score`
+        for both creativity and relevance, or `ctx.max_idea_attempts` run out.
+        A `candidate` idea (e.g. from a story plan) is tried first.
+        Returns the best (idea, validation) pair seen.
+        """
+        best = None
+        for attempt in range(max(1, ctx.max_idea_attempts)):
+            if attempt == 0 and candidate:
+                idea = candidate
+            else:
+                print(f"Generating story idea (attempt {attempt+1})...")
+                idea = await self.agenerate_story_idea(ctx, attempt)
+            print("Validating story idea...")
+            validation = await self.avalidate_story(idea, ctx)
+            scores = [score or 0 for score in self.parse_validation_scores(validation)]
+            print(f"Validation scores (creativity, relevance): {scores}")
+            if best is None or min(scores) > best[0]:
+                best = (min(scores), idea, validation)
+            if min(scores) >= ctx.min_validation_score:
+                break
+        return best[1], best[2]
+
+    async def avalidate_and_save(self, story_id, idea, ctx):
+        """Validates an idea and stores the critique and scores on its Story."""
+        try:
+            validation = await self.avalidate_story(idea, ctx)
+            await asyncio.to_thread(self.save_validation_to_mongo, story_id, validation)
+            print(f"Validation result for {story_id}:\n{validation}\n")
+        except Exception as e:
+            print(f"Background validation failed for {story_id}: {e}")
+
+    def run_in_background(self, coro):
+        task = asyncio.create_task(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+        return task
+
+    async def drain_background_tasks(self):
+        """Waits for background work started on the running event loop."""
+        loop = asyncio.get_running_loop()
+        tasks = [task for task in self.background_tasks if task.get_loop() is loop]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def create_story(self, ctx=None, voice="en"):
+        """Blocking wrapper around `acreate_story` for scripts and worker threads."""
+        async def run():
+            story = await self.acreate_story(ctx, voice)
+            # The loop closes on return, so background validation must finish first
+            await self.drain_background_tasks()
+            return story
+
+        return asyncio.run(run())
+
+    async def acreate_story(self, ctx=None, voice="en"):
+        if ctx is None:
+            ctx = self.default_context(voice)
+        # Fail fast on an unknown TTS engine, encoding profile or model instead of after the LLM stages
+        self.get_tts_backend(ctx.voice)
+        get_encoding_profile(ctx.encoding_profile)
+        self.check_stage_models(ctx.stage_models)
+
+        plan = None
+        if ctx.planner:
+            print("Planning story in a single call...")
+            plan = await self.aplan_story(ctx)
+        gated = {}
+        results = await self.build_story_graph(ctx, plan, gated).run()
+        story_idea = results["idea"]
+        validation = gated.get("validation")
+        title = results["title"]
+        raw_scenes, scenes = results["scenes"]
+        image_prompts, raw_image_prompts = results["image_prompts"]
+        # Scenes are already rendering at this point
+        output_folder, scene_pipeline = results["media"]
 
         # Save to Mongo
-        story_doc = self.save_story_to_mongo(
-            title, story_idea, scenes, raw_scenes, image_prompts, raw_image_prompts, output_folder
+        story_doc = await asyncio.to_thread(
+            self.save_story_to_mongo,
+            title, story_idea, scenes, raw_scenes, image_prompts, raw_image_prompts, output_folder, ctx,
+            validation,
         )
-
-        print("Generating images and audio...")
-        self.generate_images_and_audio(image_prompts, scenes, output_folder, voice)
+        ctx.emit("story_saved", story_id=story_doc.story_id, folder=str(output_folder))
+        if ctx.validation == "background":
+            self.run_in_background(self.avalidate_and_save(story_doc.story_id, story_idea, ctx))
 
         print("Creating video...")
         output_video = output_folder / f"{self.sanitize_filename(title)}.mp4"
-        self.create_video_for_project(output_folder, output_video)
+        await asyncio.to_thread(scene_pipeline.finish, output_video)
+        ctx.emit("video", path=str(output_video))
 
         print(f"Story and video complete: {output_video}")
 
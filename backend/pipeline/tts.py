@@ -0,0 +1,99 @@
+import shutil
+import subprocess
+import wave
+
+from gtts import gTTS
+
+
+class TTSBackend:
+    """
+    Base class for narration engines.
+
+    Attributes:
+        name (str): Engine name used in the `voice` argument ("<engine>:<language>").
+        extension (str): File extension of the audio the engine writes.
+    """
+    name = None
+    extension = ".mp3"
+
+    def synthesize(self, text, output_path, language):
+        """Writes narration of `text` to `output_path`."""
+        raise NotImplementedError
+
+
+class GTTSBackend(TTSBackend):
+    """Google Translate TTS. Needs outbound network."""
+    name = "gtts"
+    extension = ".mp3"
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+
+    def synthesize(self, text, output_path, language):
+        gTTS(text=text, lang=language, timeout=self.timeout).save(str(output_path))
+
+
+class EspeakBackend(TTSBackend):
+    """Fully local TTS using the espeak-ng (or espeak) command line tool."""
+    name = "espeak"
+    extension = ".wav"
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self.executable = shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def synthesize(self, text, output_path, language):
+        if self.executable is None:
+            raise RuntimeError("espeak-ng is not installed")
+        # Text goes in on stdin, so narration starting with "-" is never read as an option
+        subprocess.run(
+            [self.executable, "-v", language, "-w", str(output_path), "--stdin"],
+            input=text.encode("utf-8"),
+            check=True,
+            capture_output=True,
+            timeout=self.timeout,
+        )
+
+
+class SilentTTSBackend(TTSBackend):
+    """
+    Deterministic local stand-in for tests and offline benchmarks.
+    Writes silence lasting as long as the text would take to read aloud.
+    """
+    name = "silent"
+    extension = ".wav"
+    sample_rate = 16000
+    words_per_second = 2.5
+
+    def __init__(self, timeout=None):
+        pass
+
+    def synthesize(self, text, output_path, language):
+        seconds = max(1.0, len(text.split()) / self.words_per_second)
+        with wave.open(str(output_path), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(b"\x00\x00" * int(seconds * self.sample_rate))
+
+
+TTS_BACKENDS = {
+    backend.name: backend
+    for backend in (GTTSBackend, EspeakBackend, SilentTTSBackend)
+}
+
+
+def parse_voice(voice, default_engine="gtts"):
+    """
+    Splits a `voice` argument into (engine, language).
+
+    "en" uses the default engine, "espeak:en" selects an engine explicitly.
+
+    Raises:
+        ValueError: If the engine is unknown.
+    """
+    engine, _, language = voice.rpartition(":")
+    engine = engine.strip().lower() or default_engine
+    if engine not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS engine '{engine}'. Choose from: {', '.join(TTS_BACKENDS)}")
+    return engine, language.strip() or "en"
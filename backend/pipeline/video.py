@@ -0,0 +1,134 @@
+import shutil
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from moviepy import AudioFileClip
+
+
+def ffmpeg_exe():
+    """Returns the ffmpeg binary bundled with MoviePy, or the one on PATH."""
+    try:
+        from imageio_ffmpeg import get_ffmpeg_exe
+        return get_ffmpeg_exe()
+    except Exception:
+        executable = shutil.which("ffmpeg")
+        if executable is None:
+            raise RuntimeError("ffmpeg is not available")
+        return executable
+
+
+def audio_duration(audio_path):
+    clip = AudioFileClip(str(audio_path))
+    try:
+        return clip.duration
+    finally:
+        clip.close()
+
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """
+    Named set of ffmpeg settings for scene clips.
+
+    Attributes:
+        name (str): Profile name used in requests.
+        preset (str): x264 speed/quality trade-off, "ultrafast" to "veryslow".
+        crf (int): Constant rate factor; lower is higher quality (18-28 is typical).
+        width (int | None): Output width in pixels, keeping the aspect ratio;
+            None keeps the source resolution.
+        fps (float | None): Frame rate of the still-image video; None uses
+            the StoryMaker default.
+        threads (int): Encoder threads per clip; 0 lets ffmpeg decide.
+        audio_bitrate (str): AAC bitrate.
+    """
+    name: str
+    preset: str = "medium"
+    crf: int = 23
+    width: Optional[int] = None
+    fps: Optional[float] = None
+    threads: int = 0
+    audio_bitrate: str = "128k"
+
+
+ENCODING_PROFILES = {
+    profile.name: profile
+    for profile in (
+        # Fast turnaround: half of sdxl-turbo's 512px output, fastest preset,
+        # one encoder thread so many clips run at once
+        EncodingProfile("preview", preset="ultrafast", crf=30, width=256, threads=1, audio_bitrate="64k"),
+        EncodingProfile("standard"),
+        EncodingProfile("final", preset="slow", crf=18, fps=2, audio_bitrate="192k"),
+    )
+}
+
+
+def get_encoding_profile(name):
+    """
+    Raises:
+        ValueError: If no profile has this name.
+    """
+    if name not in ENCODING_PROFILES:
+        raise ValueError(f"Unknown encoding profile '{name}'. Choose from: {', '.join(ENCODING_PROFILES)}")
+    return ENCODING_PROFILES[name]
+
+
+def render_still_clip(img_path, audio_path, output_path, fps=1, profile=ENCODING_PROFILES["standard"]):
+    """
+    Encodes a still image with its narration into an mp4.
+
+    The image is encoded once per frame at a very low frame rate with
+    x264's still-image tuning, and the audio is muxed in directly, so there
+    is no per-frame compositing in Python and encode time barely depends on
+    the narration length. Audio is normalized to 44.1 kHz stereo AAC so clips
+    from different TTS engines can be joined. `profile.fps`, when set,
+    overrides `fps`.
+    """
+    fps = profile.fps or fps
+    # Even dimensions are required by yuv420p
+    scale = ["-vf", f"scale={profile.width}:-2"] if profile.width else []
+    subprocess.run(
+        [
+            ffmpeg_exe(), "-y", "-loglevel", "error",
+            "-loop", "1", "-framerate", str(fps), "-i", str(img_path),
+            "-i", str(audio_path),
+            "-t", f"{audio_duration(audio_path):.3f}",
+            *scale,
+            "-c:v", "libx264", "-tune", "stillimage", "-pix_fmt", "yuv420p", "-r", str(fps),
+            "-preset", profile.preset, "-crf", str(profile.crf), "-threads", str(profile.threads),
+            "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", profile.audio_bitrate,
+            "-movflags", "+faststart",
+            str(output_path),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return output_path
+
+
+def concat_clips(clip_paths, output_path):
+    """
+    Joins clips with ffmpeg's concat demuxer using stream copy, so nothing is
+    re-encoded. All clips must share codec settings, which holds for clips
+    made by `render_still_clip` with the same frame rate.
+    """
+    output_path = Path(output_path)
+    list_path = output_path.with_name(f".{output_path.stem}.concat.txt")
+    # Story folders are named after titles, so quotes in paths must be escaped
+    entries = [Path(path).resolve().as_posix().replace("'", "'\\''") for path in clip_paths]
+    list_path.write_text("".join(f"file '{entry}'\n" for entry in entries), encoding="utf-8")
+    try:
+        subprocess.run(
+            [
+                ffmpeg_exe(), "-y", "-loglevel", "error",
+                "-f", "concat", "-safe", "0", "-i", str(list_path),
+                "-c", "copy", "-movflags", "+faststart",
+                str(output_path),
+            ],
+            check=True,
+            capture_output=True,
+        )
+    finally:
+        list_path.unlink(missing_ok=True)
+    return output_path
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the backend the way api.py does, as top-level `pipeline` and `models`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
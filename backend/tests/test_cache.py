@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from pipeline.cache import DiskLRUCache, LLMResponseCache
+
+
+def test_eviction_drops_the_least_recently_used_entries(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=30)
+    paths = {key: cache.put_bytes(key * 8, b"x" * 10) for key in ("aa", "bb", "cc")}
+    # Distinct access times: aa is the oldest, then cc, then bb
+    for key, atime in (("aa", 100), ("bb", 300), ("cc", 200)):
+        os.utime(paths[key], (atime, 1000))
+
+    assert cache.get("aa" * 8) == paths["aa"]  # now the most recently used
+    assert paths["aa"].stat().st_mtime == 1000
+    cache.put_bytes("dd" * 8, b"x" * 10)
+
+    assert not paths["cc"].exists()
+    assert all(paths[key].exists() for key in ("aa", "bb"))
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["size_bytes"] == 30
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("time.time", clock)
+    return clock
+
+
+def test_llm_cache_memory_entries_expire(clock):
+    cache = LLMResponseCache("memory", ttl=60)
+    key = cache.key("llama2", "Write a title", {"seed": 1})
+    cache.put(key, "llama2", "The Singing Sea")
+    clock.now += 59
+    assert cache.get(key) == "The Singing Sea"
+    clock.now += 2
+    assert cache.get(key) is None
+    assert cache.stats()["entries_in_memory"] == 0
+
+
+def test_llm_cache_disk_entries_expire_across_instances(clock, tmp_path):
+    writer = LLMResponseCache("disk", ttl=60, directory=tmp_path)
+    key = writer.key("llama2", "Write a title")
+    writer.put(key, "llama2", "The Singing Sea")
+    # A fresh instance has nothing in memory, so these reads come from disk
+    clock.now += 59
+    assert LLMResponseCache("disk", ttl=60, directory=tmp_path).get(key) == "The Singing Sea"
+    clock.now += 2
+    assert LLMResponseCache("disk", ttl=60, directory=tmp_path).get(key) is None
@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from pipeline.image_batcher import ImageBatcher
+from pipeline.model_loader import ModelLoader
+
+
+def fake_render(pipe, prompts, seeds):
+    """Stands in for the diffusers call: one "image" per prompt, in order."""
+    pipe.append(list(prompts))
+    return [f"image of {prompt} ({seed})" for prompt, seed in zip(prompts, seeds)]
+
+
+def gated_loader(release, calls):
+    def load(loader):
+        release.wait()
+        return calls
+
+    return ModelLoader(load, "fake-pipe")
+
+
+def test_results_route_back_to_their_callers_across_batches():
+    release, batches = threading.Event(), []
+    batcher = ImageBatcher(gated_loader(release, batches), max_batch_size=2, max_wait_ms=0)
+    batcher._render = fake_render
+    prompts = [f"scene {n}" for n in range(5)]
+    futures = [batcher.submit(prompt, seed) for seed, prompt in enumerate(prompts)]
+    release.set()
+
+    assert [future.result(timeout=5) for future in futures] == [
+        f"image of {prompt} ({seed})" for seed, prompt in enumerate(prompts)
+    ]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert batcher.stats["images"] == 5 and batcher.stats["max_batch"] == 2
+
+
+def test_failed_pipeline_load_fails_queued_futures():
+    def load(loader):
+        raise OSError("weights not found")
+
+    batcher = ImageBatcher(ModelLoader(load, "fake-pipe"), max_batch_size=4, max_wait_ms=0)
+    batcher._render = fake_render
+    futures = [batcher.submit(f"scene {n}") for n in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="weights not found"):
+            future.result(timeout=5)
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from pipeline import jobs
+
+
+class FakeQuery:
+    def __init__(self, docs):
+        self.docs = list(docs)
+
+    def order_by(self, field):
+        return FakeQuery(sorted(self.docs, key=lambda doc: getattr(doc, field)))
+
+    def first(self):
+        return self.docs[0] if self.docs else None
+
+    def __iter__(self):
+        return iter(self.docs)
+
+
+class FakeJob:
+    """In-memory stand-in for the `Job` document, supporting the calls JobQueue makes."""
+    store = {}
+
+    def __init__(self, job_id, status, params=None, created_at=0):
+        self.job_id = job_id
+        self.status = status
+        self.params = params or {}
+        self.created_at = created_at
+        self.started_at = None
+        self.history = [status]
+
+    def save(self):
+        FakeJob.store[self.job_id] = self
+
+    def update(self, **changes):
+        for change, value in changes.items():
+            op, _, field = change.partition("__")
+            setattr(self, field, value if op == "set" else None)
+        self.history.append(self.status)
+
+    @classmethod
+    def objects(cls, job_id=None, status__in=None):
+        return FakeQuery(
+            job for job in cls.store.values()
+            if (job_id is None or job.job_id == job_id)
+            and (status__in is None or job.status in status__in)
+        )
+
+
+@pytest.fixture
+def fake_jobs(monkeypatch):
+    FakeJob.store = {}
+    monkeypatch.setattr(jobs, "Job", FakeJob)
+    return FakeJob.store
+
+
+def test_start_requeues_unfinished_jobs_in_order(fake_jobs):
+    FakeJob("interrupted", "running", {"genre": "noir"}, created_at=1).save()
+    FakeJob("waiting", "queued", {"genre": "sci-fi"}, created_at=2).save()
+    FakeJob("done", "completed", {"genre": "fantasy"}, created_at=0).save()
+    ran = []
+
+    async def runner(params, progress):
+        ran.append(params["genre"])
+        return {"genre": params["genre"]}
+
+    async def run():
+        queue = jobs.JobQueue(runner, num_workers=1)
+        await queue.start()
+        assert [queue.position(job_id) for job_id in ("interrupted", "waiting")] == [1, 2]
+        await asyncio.wait_for(queue.queue.join(), timeout=5)
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(run())
+    assert ran == ["noir", "sci-fi"]
+    assert fake_jobs["interrupted"].history == ["running", "queued", "running", "completed"]
+    assert fake_jobs["waiting"].result == {"genre": "sci-fi"}
+    assert fake_jobs["done"].history == ["completed"]
+    assert [e["event"] for e in queue.progress["interrupted"].events] == ["running", "completed"]
+
+
+def test_failed_job_records_the_error(fake_jobs):
+    async def runner(params, progress):
+        raise RuntimeError("ollama is down")
+
+    async def run():
+        queue = jobs.JobQueue(runner)
+        await queue.start()
+        job_id = await queue.submit({"genre": "noir"})
+        await asyncio.wait_for(queue.queue.join(), timeout=5)
+        await queue.stop()
+        return fake_jobs[job_id]
+
+    job = asyncio.run(run())
+    assert job.status == "failed" and job.error == "ollama is down"
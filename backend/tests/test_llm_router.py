@@ -0,0 +1,113 @@
+import pytest
+
+from pipeline.llm_router import LLMRouter
+
+
+def test_routes_to_least_outstanding():
+    router = LLMRouter(["http://a", "http://b/"])
+    first = router.acquire()
+    second = router.acquire()
+    assert {first.url, second.url} == {"http://a", "http://b"}
+    router.release(first, ok=True)
+    assert router.acquire() is first
+
+
+def test_requires_a_url():
+    with pytest.raises(ValueError):
+        LLMRouter(["", " "])
+
+
+def test_circuit_opens_after_consecutive_failures():
+    router = LLMRouter(["http://a", "http://b"], failure_threshold=2, cooldown=60)
+    a, b = router.backends
+    for _ in range(2):
+        router.acquire()
+        router.release(a, ok=False)
+    assert a.state() == "open"
+    # Even with more requests in flight on b, a gets no traffic while open
+    b.outstanding = 5
+    assert router.acquire() is b
+
+
+def test_success_resets_failure_count():
+    router = LLMRouter(["http://a"], failure_threshold=2)
+    a = router.backends[0]
+    router.release(router.acquire(), ok=False)
+    router.release(router.acquire(), ok=True)
+    router.release(router.acquire(), ok=False)
+    assert a.state() == "closed"
+
+
+def test_half_open_allows_a_single_trial(monkeypatch):
+    router = LLMRouter(["http://a", "http://b"], failure_threshold=1, cooldown=10)
+    a, b = router.backends
+    router.release(router.acquire(), ok=False)
+    failed = a if a.state() == "open" else b
+    failed.open_until = 1.0  # cooldown over
+    assert failed.state() == "half_open"
+
+    other = b if failed is a else a
+    other.outstanding = 5
+    trial = router.acquire()
+    assert trial is failed
+    assert router.acquire() is other
+    router.release(trial, ok=False)
+    assert failed.state() == "open"
+
+
+def test_all_open_picks_the_soonest_to_recover():
+    router = LLMRouter(["http://a", "http://b"], failure_threshold=1, cooldown=60)
+    a, b = router.backends
+    router.release(router.acquire(), ok=False)
+    router.release(router.acquire(), ok=False)
+    a.open_until += 30
+    assert router.acquire() is b
+
+
+def test_lease_records_outcome():
+    router = LLMRouter(["http://a"], failure_threshold=1)
+    a = router.backends[0]
+    with router.lease() as lease:
+        lease.fail()
+    assert a.state() == "open" and a.outstanding == 0
+
+    router = LLMRouter(["http://a"], failure_threshold=1)
+    a = router.backends[0]
+    with pytest.raises(RuntimeError):
+        with router.lease():
+            raise RuntimeError("boom")
+    assert a.state() == "open" and a.errors == 1
+
+
+def test_cancelled_lease_leaves_circuit_alone():
+    import asyncio
+
+    router = LLMRouter(["http://a"], failure_threshold=1)
+    a = router.backends[0]
+    with pytest.raises(asyncio.CancelledError):
+        with router.lease():
+            raise asyncio.CancelledError()
+    assert a.state() == "closed" and a.outstanding == 0
+
+
+def test_health_check_closes_only_circuits_it_opened():
+    router = LLMRouter(["http://a"], failure_threshold=3, cooldown=60)
+    a = router.backends[0]
+    router.mark_health(a, healthy=False)
+    assert a.state() == "open"
+    router.mark_health(a, healthy=True)
+    assert a.state() == "closed"
+
+
+def test_health_check_half_opens_circuits_opened_by_requests():
+    router = LLMRouter(["http://a"], failure_threshold=1, cooldown=60)
+    a = router.backends[0]
+    router.release(router.acquire(), ok=False)
+    router.mark_health(a, healthy=True)
+    assert a.state() == "half_open"
+    # A real request still decides whether the circuit closes
+    router.release(router.acquire(), ok=False)
+    assert a.state() == "open"
+    router.mark_health(a, healthy=True)
+    router.release(router.acquire(), ok=True)
+    assert a.state() == "closed"
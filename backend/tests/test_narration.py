@@ -0,0 +1,73 @@
+import wave
+
+from pipeline.cache import AudioCache
+from pipeline.context import GenerationContext
+from pipeline.story_maker import StoryMaker
+from pipeline.tts import EspeakBackend
+
+SCENE = {"scene": 1, "summary": "A quiet harbor.", "description": "Boats rock gently in the quiet harbor at dawn."}
+
+
+def make_maker(tmp_path, audio_cache=None):
+    return StoryMaker(None, audio_cache=audio_cache, output_dir=tmp_path / "stories")
+
+
+def narrate_twice(tmp_path):
+    """Narrates the same scene for two stories sharing an audio cache."""
+    maker = make_maker(tmp_path, AudioCache(tmp_path / "audio-cache"))
+    ctx = GenerationContext(voice="silent:en")
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+    first_path = maker.narrate_scene(SCENE, first, ctx)
+    mtime = first_path.stat().st_mtime
+    second_path = maker.narrate_scene(SCENE, second, ctx)
+    return maker, first_path, mtime, second_path
+
+
+def test_silent_narration_is_written(tmp_path):
+    maker = make_maker(tmp_path)
+    audio_path = maker.narrate_scene(SCENE, tmp_path, GenerationContext(voice="silent:en"))
+    assert audio_path == tmp_path / "scene_1.wav"
+    with wave.open(str(audio_path)) as wav:
+        assert wav.getnframes() / wav.getframerate() >= 1.0
+
+
+def test_scene_without_description_is_skipped(tmp_path):
+    maker = make_maker(tmp_path)
+    assert maker.narrate_scene({"scene": 1, "description": " "}, tmp_path, GenerationContext(voice="silent:en")) is None
+
+
+def test_repeated_narration_is_served_from_the_cache(tmp_path):
+    maker, first_path, _, second_path = narrate_twice(tmp_path)
+    assert second_path == tmp_path / "second" / "scene_1.wav"
+    assert second_path.read_bytes() == first_path.read_bytes()
+    stats = maker.audio_cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_cache_hit_keeps_linked_audio_mtime(tmp_path):
+    _, first_path, mtime, _ = narrate_twice(tmp_path)
+    assert first_path.stat().st_mtime == mtime
+
+
+def test_espeak_reads_text_from_stdin(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr("subprocess.run", lambda args, **kwargs: calls.append((args, kwargs)))
+    backend = EspeakBackend()
+    backend.executable = "espeak-ng"
+    backend.synthesize("- a bulleted line", tmp_path / "scene_1.wav", "en")
+    (args, kwargs), = calls
+    assert "- a bulleted line" not in args
+    assert kwargs["input"] == b"- a bulleted line"
+
+
+def test_failed_narration_does_not_sleep_after_the_last_attempt(tmp_path, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("time.sleep", sleeps.append)
+    maker = make_maker(tmp_path)
+    backend, _ = maker.get_tts_backend("silent:en")
+    monkeypatch.setattr(backend, "synthesize", lambda *args: 1 / 0)
+    assert maker.narrate_scene(SCENE, tmp_path, GenerationContext(voice="silent:en")) is None
+    assert len(sleeps) == maker.max_retries - 1
+    assert all(0 <= delay <= 2 ** attempt for attempt, delay in enumerate(sleeps))
@@ -0,0 +1,70 @@
+import asyncio
+
+import httpx
+import pytest
+
+from pipeline.ollama_client import AsyncOllamaClient, OllamaRequestError, duration_seconds
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [(300, 300), ("30m", 1800), ("1h30m", 5400), ("45s", 45), ("1.5h", 5400), ("-1m", -60), ("500ms", 0.5)],
+)
+def test_duration_seconds(value, seconds):
+    assert duration_seconds(value) == seconds
+
+
+@pytest.mark.parametrize("value", ["", "soon", "30", "5 m", "m"])
+def test_duration_seconds_rejects_garbage(value):
+    with pytest.raises(ValueError):
+        duration_seconds(value)
+
+
+@pytest.mark.parametrize(
+    "keep_alive, seconds",
+    [(None, 300), ("30m", 1800), ("600", 600), ("-1", None), (-1, None)],
+)
+def test_keep_alive_seconds(keep_alive, seconds):
+    assert AsyncOllamaClient("http://ollama:11434", keep_alive=keep_alive).keep_alive_seconds() == seconds
+
+
+def mock_client(handler):
+    client = AsyncOllamaClient("http://ollama:11434", backoff_base=0)
+    client.client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_client_error_is_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(404, json={"error": "model 'nope' not found"})
+
+    client = mock_client(handler)
+    with pytest.raises(OllamaRequestError, match="model 'nope' not found") as info:
+        asyncio.run(client.generate("nope", "hi"))
+    assert info.value.status_code == 404
+    assert len(calls) == 1
+    assert client.router.backends[0].state() == "closed"
+
+
+def test_stream_client_error_is_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400, text="bad request")
+
+    async def consume(client):
+        return [chunk async for chunk in client.stream("llama2", "hi")]
+
+    with pytest.raises(OllamaRequestError, match="bad request"):
+        asyncio.run(consume(mock_client(handler)))
+    assert len(calls) == 1
+
+
+def test_server_error_is_retried():
+    responses = iter([httpx.Response(503), httpx.Response(200, json={"response": " ok "})])
+    client = mock_client(lambda request: next(responses))
+    assert asyncio.run(client.generate("llama2", "hi")) == "ok"
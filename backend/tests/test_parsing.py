@@ -0,0 +1,99 @@
+from pipeline.parsing import (
+    IncrementalSceneParser,
+    missing_scenes,
+    parse_numbered_items,
+    parse_scenes,
+)
+
+WELL_FORMED = (
+    "Scene 1: A girl finds a key.\n"
+    "Description: Dust covers the attic where she searches.\n"
+    "Scene 2: The door opens.\n"
+    "Description: Light spills into the hallway."
+)
+
+
+def test_parse_scenes_well_formed():
+    assert parse_scenes(WELL_FORMED) == [
+        {"scene": 1, "summary": "A girl finds a key.", "description": "Dust covers the attic where she searches."},
+        {"scene": 2, "summary": "The door opens.", "description": "Light spills into the hallway."},
+    ]
+
+
+def test_parse_scenes_markdown_and_numbering_variants():
+    text = (
+        "Here are your scenes:\n\n"
+        "**Scene 1: The Cave**\n"
+        "**Description:** A dark cave\nfull of bats.\n\n"
+        "### Scene Two - The River\n"
+        "Description:   Water   flows.\n\n"
+        "Scene #3.\n"
+        "Summary: Night falls\n"
+        "Description: Stars appear.\n\n"
+        "Scene 4 (The Dream): The hero sleeps.\n"
+        "Description: Dreams come.\n"
+    )
+    scenes = parse_scenes(text)
+    assert [s["scene"] for s in scenes] == [1, 2, 3, 4]
+    assert scenes[0] == {"scene": 1, "summary": "The Cave", "description": "A dark cave full of bats."}
+    assert scenes[1]["summary"] == "The River"
+    assert scenes[1]["description"] == "Water flows."
+    assert scenes[2]["summary"] == "Night falls"
+    assert scenes[3]["summary"] == "The hero sleeps."
+
+
+def test_parse_scenes_parenthetical_title_only():
+    scenes = parse_scenes("Scene 1 (The Opening)\nDescription: The sun rises.")
+    assert scenes == [{"scene": 1, "summary": "The Opening", "description": "The sun rises."}]
+
+
+def test_parse_scenes_without_description_label():
+    scenes = parse_scenes("Scene 1:\nThe hero sleeps. Dreams come.")
+    assert scenes == [{"scene": 1, "summary": "The hero sleeps.", "description": "The hero sleeps. Dreams come."}]
+
+
+def test_parse_scenes_numbered_list_fallback():
+    scenes = parse_scenes("1. The cave\nDescription: Dark.\n2) The river\nDescription: Wet.")
+    assert [(s["scene"], s["summary"]) for s in scenes] == [(1, "The cave"), (2, "The river")]
+
+
+def test_parse_scenes_keeps_first_of_duplicate_numbers():
+    scenes = parse_scenes("Scene 1: First\nDescription: A.\nScene 1: Again\nDescription: B.")
+    assert scenes == [{"scene": 1, "summary": "First", "description": "A."}]
+
+
+def test_scenes_without_description_are_missing():
+    scenes = parse_scenes(WELL_FORMED + "\nScene 4: Only a title\n")
+    assert [s["scene"] for s in scenes] == [1, 2]
+    assert missing_scenes(scenes, 4) == [3, 4]
+
+
+def test_parse_scenes_unstructured_text():
+    assert parse_scenes("Once upon a time there was a story.") == []
+
+
+def test_parse_numbered_items():
+    text = "Scene 1: a castle,\nultra-detailed\n**Scene 2 (Dragon):** a dragon, 8K\nScene 3:"
+    assert parse_numbered_items(text) == {1: "a castle, ultra-detailed", 2: "a dragon, 8K"}
+
+
+def test_incremental_parser_waits_for_next_header():
+    parser = IncrementalSceneParser()
+    assert parser.feed("Scene 1: A girl finds a key.\nDescription: Dust") == []
+    assert parser.feed(" covers the attic.\nScene 2: The") == [
+        {"scene": 1, "summary": "A girl finds a key.", "description": "Dust covers the attic."},
+    ]
+    assert parser.feed(" door opens.\nDescription: Light.") == []
+    assert parser.close() == [{"scene": 2, "summary": "The door opens.", "description": "Light."}]
+    assert parser.close() == []
+
+
+def test_incremental_parser_matches_batch_parse_for_any_chunking():
+    for size in (1, 3, 7, 50):
+        parser = IncrementalSceneParser()
+        scenes = []
+        for start in range(0, len(WELL_FORMED), size):
+            scenes += parser.feed(WELL_FORMED[start:start + size])
+        scenes += parser.close()
+        assert scenes == parse_scenes(WELL_FORMED)
+        assert parser.text == WELL_FORMED
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from pipeline.planner import PlanError, format_image_prompts, format_scenes, parse_plan
+from pipeline.parsing import parse_numbered_items, parse_scenes
+
+
+def make_plan(num_scenes=2, **overrides):
+    plan = {
+        "idea": " A lighthouse keeper hears the sea sing. ",
+        "title": "The Singing Sea",
+        "scenes": [
+            {
+                "scene": 7,
+                "summary": f"Summary {i}",
+                "description": f"Description {i}",
+                "image_prompt": f"Prompt {i}",
+            }
+            for i in range(1, num_scenes + 1)
+        ],
+    }
+    plan.update(overrides)
+    return json.dumps(plan)
+
+
+def test_parse_plan_normalizes_and_renumbers():
+    plan = parse_plan(make_plan(3), 2)
+    assert plan["idea"] == "A lighthouse keeper hears the sea sing."
+    assert plan["title"] == "The Singing Sea"
+    assert plan["scenes"] == [
+        {"scene": 1, "summary": "Summary 1", "description": "Description 1"},
+        {"scene": 2, "summary": "Summary 2", "description": "Description 2"},
+    ]
+    assert plan["image_prompts"] == {1: "Prompt 1", 2: "Prompt 2"}
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "not json",
+        "[]",
+        make_plan(title=""),
+        make_plan(idea=None),
+        make_plan(scenes="Scene 1: ..."),
+        make_plan(1),
+        make_plan(scenes=[{"summary": "s", "description": "d"}] * 2),
+        make_plan(scenes=["Scene 1", "Scene 2"]),
+    ],
+)
+def test_parse_plan_rejects_malformed_plans(raw):
+    with pytest.raises(PlanError):
+        parse_plan(raw, 2)
+
+
+def test_formatted_plan_round_trips_through_text_parsers():
+    plan = parse_plan(make_plan(2), 2)
+    assert parse_scenes(format_scenes(plan["scenes"])) == plan["scenes"]
+    assert parse_numbered_items(format_image_prompts(plan["image_prompts"])) == plan["image_prompts"]
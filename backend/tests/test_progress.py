@@ -0,0 +1,25 @@
+import asyncio
+
+from pipeline.progress import ProgressStream
+
+
+def collect(progress, after=None):
+    async def run():
+        return [message["id"] async for message in progress.subscribe(after=after)]
+
+    return asyncio.run(run())
+
+
+def test_subscribe_replays_history_until_terminal_event():
+    progress = ProgressStream()
+    for event in ("queued", "running", "completed"):
+        progress.emit(event)
+    assert collect(progress) == [0, 1, 2]
+
+
+def test_subscribe_skips_events_the_client_already_saw():
+    progress = ProgressStream()
+    for event in ("queued", "running", "image", "completed"):
+        progress.emit(event)
+    assert collect(progress, after=1) == [2, 3]
+    assert collect(progress, after=3) == []
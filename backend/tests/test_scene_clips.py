@@ -0,0 +1,22 @@
+import os
+
+from pipeline.story_maker import StoryMaker
+
+
+def test_clips_are_only_reused_for_the_same_profile(tmp_path, monkeypatch):
+    maker = StoryMaker(None, output_dir=tmp_path / "stories")
+    rendered = []
+    monkeypatch.setattr(maker, "render_scene_clip", lambda img, audio, out, profile: rendered.append(out) or out)
+    monkeypatch.setattr(maker, "concatenate_clips", lambda clips, output_path: clips)
+    for name in ("scene_1.png", "scene_1.wav", "scene_1.preview.mp4"):
+        (tmp_path / name).touch()
+    os.utime(tmp_path / "scene_1.preview.mp4", (0, (tmp_path / "scene_1.wav").stat().st_mtime + 1))
+
+    assert maker.create_video_for_project(tmp_path, tmp_path / "out.mp4", "preview") == [
+        tmp_path / "scene_1.preview.mp4"
+    ]
+    assert rendered == []
+    assert maker.create_video_for_project(tmp_path, tmp_path / "out.mp4", "final") == [
+        tmp_path / "scene_1.final.mp4"
+    ]
+    assert rendered == [tmp_path / "scene_1.final.mp4"]
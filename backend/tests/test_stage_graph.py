@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from pipeline.stage_graph import StageGraph
+
+
+def test_independent_stages_run_concurrently():
+    started = []
+
+    async def idea():
+        return "idea"
+
+    async def branch(name, idea):
+        started.append(name)
+        # Neither branch can finish until both have started
+        while len(started) < 2:
+            await asyncio.sleep(0)
+        return f"{name} of {idea}"
+
+    graph = StageGraph()
+    graph.add("idea", idea)
+    graph.add("title", lambda idea: branch("title", idea), deps=["idea"])
+    graph.add("scenes", lambda idea: branch("scenes", idea), deps=["idea"])
+    results = asyncio.run(asyncio.wait_for(graph.run(), timeout=5))
+    assert results == {"idea": "idea", "title": "title of idea", "scenes": "scenes of idea"}
+
+
+def test_first_failure_cancels_sibling_stages():
+    cancelled = []
+
+    async def idea():
+        return "idea"
+
+    async def failing(idea):
+        await asyncio.sleep(0)
+        raise RuntimeError("title failed")
+
+    async def slow(idea):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append("scenes")
+            raise
+
+    async def downstream(scenes):
+        cancelled.append("never runs")
+
+    graph = StageGraph()
+    graph.add("idea", idea)
+    graph.add("title", failing, deps=["idea"])
+    graph.add("scenes", slow, deps=["idea"])
+    graph.add("image_prompts", downstream, deps=["scenes"])
+    with pytest.raises(RuntimeError, match="title failed"):
+        asyncio.run(asyncio.wait_for(graph.run(), timeout=5))
+    assert cancelled == ["scenes"]
+
+
+def test_unknown_dependency_is_rejected():
+    async def title(idea):
+        return "title"
+
+    with pytest.raises(ValueError, match="idea"):
+        asyncio.run(StageGraph().add("title", title, deps=["idea"]).run())
@@ -0,0 +1,38 @@
+import pytest
+
+from pipeline.context import LLM_STAGES, GenerationContext, parse_stage_models
+from pipeline.story_maker import StoryMaker
+
+
+def test_parse_stage_models():
+    assert parse_stage_models(" title=llama3.2:1b, image_prompts = phi3 ,") == {
+        "title": "llama3.2:1b",
+        "image_prompts": "phi3",
+    }
+    assert parse_stage_models(None) == {}
+
+
+@pytest.mark.parametrize("spec", ["title", "title=", "=llama2", "ending=llama2"])
+def test_parse_stage_models_rejects_bad_entries(spec):
+    with pytest.raises(ValueError):
+        parse_stage_models(spec)
+
+
+def test_context_rejects_unknown_stages():
+    assert GenerationContext(stage_models={stage: "llama2" for stage in LLM_STAGES}).stage_models
+    with pytest.raises(ValueError, match="ending"):
+        GenerationContext(stage_models={"ending": "llama2"})
+
+
+def test_request_models_must_be_allowed(tmp_path):
+    maker = StoryMaker(
+        None,
+        model_name="llama3",
+        stage_models={"title": "llama3.2:1b"},
+        allowed_models=["phi3"],
+        output_dir=tmp_path,
+    )
+    assert maker.allowed_models() == ["llama3", "llama3.2:1b", "phi3"]
+    maker.check_stage_models({"idea": "llama3.2:1b", "scenes": "phi3"})
+    with pytest.raises(ValueError, match="mistral"):
+        maker.check_stage_models({"idea": "mistral"})
@@ -0,0 +1,27 @@
+import pytest
+
+from pipeline.parsing import parse_validation_scores
+
+
+@pytest.mark.parametrize(
+    "critique, expected",
+    [
+        ("Creativity (1-10): 8\nRelevance (1-10): 7", (8, 7)),
+        ("I'd rate this a 4/10 for creativity and 9/10 for relevance", (4, 9)),
+        ("Creativity: 8/10. Relevance: 7/10", (8, 7)),
+        ("Scores: 7/10 creativity, 6/10 relevance", (7, 6)),
+        ("Creativity: 8/10\nRelevance: 7/10", (8, 7)),
+        ("Creativity: 8/10 Relevance: 7/10", (8, 7)),
+        ("Creativity is a stretch. 6/10 relevance", (None, 6)),
+        ("**Creativity:** 6 out of 10\n**Relevance:** 9 out of 10", (6, 9)),
+        ("On a scale of 1 to 10, creativity: 6, relevance to the genre: 9", (6, 9)),
+        ("Creativity - 7.5/10", (8, None)),
+        ("A lovely idea, but I won't score it.", (None, None)),
+    ],
+)
+def test_parse_validation_scores(critique, expected):
+    assert parse_validation_scores(critique) == expected
+
+
+def test_scores_are_capped_at_ten():
+    assert parse_validation_scores("Creativity: 12") == (10, None)
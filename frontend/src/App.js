@@ -1,6 +1,25 @@
-import React, { useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import "./App.css";
 
+const API_URL = "http://localhost:8000";
+
+/** Progress events streamed by `/jobs/{job_id}/events` */
+const PROGRESS_EVENTS = [
+  "queued",
+  "running",
+  "idea",
+  "title",
+  "scene",
+  "image_prompt",
+  "story_saved",
+  "audio",
+  "image",
+  "clip",
+  "video",
+  "completed",
+  "failed",
+];
+
 /**
  * StoryMaker Application
  *
@@ -10,7 +29,8 @@ import "./App.css";
  *
  * Features:
  * - Input fields for genre and number of scenes
- * - Calls backend API to generate stories
+ * - Submits a story generation job to the backend API
+ * - Streams progress events and shows partial results as they arrive
  * - Displays story metadata and scenes
  * - Allows downloading the generated video
  */
@@ -30,19 +50,54 @@ function App() {
   /** Whether API request is currently loading */
   const [loading, setLoading] = useState(false);
 
+  /** Partial story built from progress events while the job runs */
+  const [progress, setProgress] = useState(null);
+
+  /** Open progress stream, closed when the job ends or the app unmounts */
+  const eventSourceRef = useRef(null);
+
+  useEffect(() => () => eventSourceRef.current?.close(), []);
+
+  /**
+   * Applies one progress event to the partial story.
+   *
+   * @param {string} event - Event name
+   * @param {object} data - Event payload
+   */
+  const applyProgressEvent = (event, data) => {
+    setProgress((prev) => {
+      const next = { ...prev, status: event };
+      if (event === "idea") next.storyIdea = data.story_idea;
+      if (event === "title") next.title = data.title;
+      if (event === "scene") {
+        next.scenes = { ...prev.scenes, [data.scene]: { ...data, assets: [] } };
+      }
+      if (["image", "audio", "clip"].includes(event) && prev.scenes[data.scene]) {
+        const scene = prev.scenes[data.scene];
+        next.scenes = {
+          ...prev.scenes,
+          [data.scene]: { ...scene, assets: [...scene.assets, event] },
+        };
+      }
+      return next;
+    });
+  };
+
   /**
    * Handles story generation request.
    *
-   * Sends POST request to backend with genre and number of scenes.
-   * Updates state with API response or error message.
+   * Submits a job with genre and number of scenes, then listens to its
+   * progress stream. Updates state with partial results, the final API
+   * response or an error message.
    */
   const handleGenerateStory = async () => {
     try {
       setError(null);
       setApiResponse(null);
+      setProgress({ status: "submitting", scenes: {} });
       setLoading(true);
 
-      const response = await fetch("http://localhost:8000/generate_story/", {
+      const response = await fetch(`${API_URL}/jobs/`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ genre, num_scenes: numScenes }),
@@ -52,12 +107,40 @@ function App() {
         throw new Error(`HTTP error! status: ${response.status}`);
       }
 
-      const data = await response.json();
-      setApiResponse(data);
+      const { job_id: jobId } = await response.json();
+      eventSourceRef.current?.close();
+      const eventSource = new EventSource(`${API_URL}/jobs/${jobId}/events`);
+      eventSourceRef.current = eventSource;
+
+      const finish = () => {
+        eventSource.close();
+        setLoading(false);
+      };
+
+      PROGRESS_EVENTS.forEach((name) =>
+        eventSource.addEventListener(name, (e) => {
+          const data = JSON.parse(e.data);
+          applyProgressEvent(name, data);
+          if (name === "completed") {
+            setApiResponse({ metadata: data.metadata });
+            setProgress(null);
+            finish();
+          } else if (name === "failed") {
+            setError("Story generation failed: " + data.error);
+            finish();
+          }
+        })
+      );
+
+      eventSource.onerror = () => {
+        if (eventSource.readyState === EventSource.CLOSED) {
+          setError("Lost connection to the progress stream.");
+          finish();
+        }
+      };
     } catch (err) {
       setError("Error connecting to API: " + err.message);
       console.error(err);
-    } finally {
       setLoading(false);
     }
   };
@@ -72,7 +155,7 @@ function App() {
     if (apiResponse && apiResponse.metadata && apiResponse.metadata.video_file) {
       const filePath = encodeURIComponent(apiResponse.metadata.video_file);
       window.open(
-        `http://localhost:8000/download_file/?path=${filePath}`,
+        `${API_URL}/download_file/?path=${filePath}`,
         "_blank"
       );
     } else {
@@ -118,6 +201,33 @@ function App() {
         {loading ? <span className="spinner"></span> : "Generate Story"}
       </button>
 
+      {/* Partial results while the story is generating */}
+      {loading && progress && (
+        <div className="responseBox">
+          <p className="storyMeta">
+            <strong>Status:</strong> {progress.status.replace("_", " ")}
+          </p>
+          {progress.title && <h2 className="storyTitle">{progress.title}</h2>}
+          {progress.storyIdea && <p className="storyIdea">{progress.storyIdea}</p>}
+          {Object.keys(progress.scenes).length > 0 && (
+            <div className="scenesContainer">
+              {Object.values(progress.scenes).map((scene) => (
+                <div key={scene.scene} className="sceneCard">
+                  <h4>Scene {scene.scene}</h4>
+                  <p className="sceneSummary">
+                    <em>{scene.summary}</em>
+                  </p>
+                  <p>{scene.description}</p>
+                  {scene.assets.length > 0 && (
+                    <p className="sceneAssets">Ready: {scene.assets.join(", ")}</p>
+                  )}
+                </div>
+              ))}
+            </div>
+          )}
+        </div>
+      )}
+
       {/* API Response / Error Display */}
       {(error || apiResponse) && (
         <div className="responseBox">